@@ -8,6 +8,9 @@ import os
 import numpy as np
 from pandas.errors import SettingWithCopyWarning
 from datetime import datetime
+from analytics import portfolio_summary
+from backtest import long_only_backtest
+from indicators import add_indicator_columns, identify_macd_peaks_and_troughs_using_derivative
 
 
 # Use your own API key and secret
@@ -24,34 +27,6 @@ interval = '1h'
 limit = 1000
 days_to_fetch=10
 
-def calculate_atr(data, window=7):
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    atr = true_range.rolling(window).mean()
-    return atr
-
-# Function to calculate MACD and signal line
-def calculate_macd(df):
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    df['MACD'] = macd
-    df['Signal'] = signal
-    df['MACD_Histogram'] = macd - signal
-
-def compute_rsi(data, window=7): #using window=14 gives poor results, 7 is good for 15m data
-    delta = data.diff()
-    up, down = delta.clip(lower=0), -1 * delta.clip(upper=0)
-    roll_up = up.rolling(window).mean()
-    roll_down = down.rolling(window).mean()
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
 # def identify_macd_peaks_and_troughs(data):
 #     # Initialize columns for peaks and troughs
 #     data['Green_Peak'] = False
@@ -77,26 +52,6 @@ def compute_rsi(data, window=7): #using window=14 gives poor results, 7 is good
 #
 #     return data
 
-def identify_macd_peaks_and_troughs_using_derivative(data): #Using normal macd crossover gives poor results
-    # Calculate the first derivative (rate of change) of the MACD Histogram
-    data['MACD_Histogram_Delta'] = data['MACD_Histogram'].diff()
-
-    # Initialize columns for peaks and troughs
-    data['Green_Peak'] = False
-    data['Red_Peak'] = False
-
-    # Iterate over the data
-    for i in range(2, len(data)):
-        # Check for Green Peak (MACD Histogram peak)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] > 0 and data['MACD_Histogram_Delta'].iloc[i] <= 0:
-            data['Green_Peak'].iloc[i - 1] = True
-
-        # Check for Red Trough (MACD Histogram trough)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] < 0 and data['MACD_Histogram_Delta'].iloc[i] >= 0:
-            data['Red_Peak'].iloc[i - 1] = True
-
-    return data
-
 def buy_signal_macd_peaks(data):
     identify_macd_peaks_and_troughs_using_derivative(data)
     return data['Red_Peak']
@@ -133,9 +88,8 @@ def read_data_from_excel():
     #return pd.read_excel(excel_file_path, index_col='Timestamp')
 
 def calculate_macd_and_rsi(df):
-    calculate_macd(df)
-    df['RSI'] = compute_rsi(df['Close'])  # Make sure to assign the Series returned by compute_rsi
-    df['ATR'] = calculate_atr(df)
+    # MACD, Signal, MACD_Histogram, RSI and ATR in one pass over the OHLC columns
+    add_indicator_columns(df, rsi_window=7, atr_window=7)
     identify_macd_peaks_and_troughs_using_derivative(df)
 
 # Initial setup for the plot
@@ -157,100 +111,17 @@ def plot_data(df):
     # Plot using mplfinance with panel ratios
     mpf.plot(df, type='candle', style=s, addplot=apds, title='BTC/USDT OHLC', panel_ratios=(6,3,2))
 
-def trading_strategy(data, initial_capital):
+def trading_strategy(data, initial_capital, verbose=False):
     maker_taker_fee = 0.00075
 
-    # Calculate MACD and Signal Line
-    exp1 = data['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = exp1 - exp2
-    data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-    data['MACD_Histogram'] = data['MACD'] - data['Signal_Line']
-
-    # Initialize portfolio and trade log
-    portfolio = pd.DataFrame(index=data.index)
-    portfolio['holdings'] = np.zeros(len(data))
-    portfolio['cash'] = np.zeros(len(data))
-    portfolio['cash'][0] = initial_capital
-    portfolio['total'] = portfolio['cash']
-    trade_log = []
     # Generate signals based on MACD peaks
     buy_signal = buy_signal_macd_peaks(data)
     sell_signal = sell_signal_macd_peaks(data)
 
-    # New variable to track if a position is held
-    position_held = False
-
-    for i in range(1, len(data)):
-
-        portfolio['holdings'][i] = portfolio['holdings'][i - 1]
-        portfolio['cash'][i] = portfolio['cash'][i - 1]
-
-        date = data.index[i]
-
-        if buy_signal[i] and not position_held  and portfolio['cash'][i - 1] > 0 and data['RSI'][i] < 50 and data['ATR'][i] < 1000:
-            # Calculate transaction cost
-            transaction_cost = portfolio['cash'][i - 1] * maker_taker_fee
-            invest_amount = portfolio['cash'][i - 1] - transaction_cost
-            portfolio['holdings'][i] = invest_amount / data['Close'][i]
-            portfolio['cash'][i] = 0
-            #print(f"{date} - Buy: Price = {data['Close'][i]}, Amount = {invest_amount}")
-            trade_log.append({
-                'Date': date,
-                'Action': 'Buy',
-                'Price': data['Close'][i],
-                'BTC_Amount': invest_amount / data['Close'][i],
-                'Cash_Used': invest_amount,
-                'RSI': data['RSI'][i],
-                'ATR': data['ATR'][i]
-            })
-            print({
-                'Date': date,
-                'Action': 'Buy',
-                'Price': data['Close'][i],
-                'BTC_Amount': invest_amount / data['Close'][i],
-                'Cash_Used': invest_amount,
-                'RSI': data['RSI'][i],
-                'ATR': data['ATR'][i]
-            })
-            position_held = True
-
-        elif sell_signal[i] and position_held and portfolio['holdings'][i - 1] > 0 and data['RSI'][i] > 50 and data['ATR'][i] < 1000:
-            # Calculate transaction cost
-            sell_value = portfolio['holdings'][i - 1] * data['Close'][i]
-            transaction_cost = sell_value * maker_taker_fee
-            portfolio['cash'][i] = sell_value - transaction_cost
-            #print(f"{date} - Sell: Price = {data['Close'][i]}, Amount = {sell_value}")
-            portfolio['holdings'][i] = 0
-            trade_log.append({
-                'Date': date,
-                'Action': 'Sell',
-                'Price': data['Close'][i],
-                'BTC_Amount': portfolio['holdings'][i - 1],
-                'Cash_Gained': sell_value,
-                'RSI': data['RSI'][i],
-                'ATR': data['ATR'][i]
-            })
-            print({
-                'Date': date,
-                'Action': 'Sell',
-                'Price': data['Close'][i],
-                'BTC_Amount': portfolio['holdings'][i - 1],
-                'Cash_Gained': sell_value,
-                'RSI': data['RSI'][i],
-                'ATR': data['ATR'][i]
-            })
-            position_held = False
-
-        # Update total portfolio value
-        portfolio['total'][i] = portfolio['cash'][i] + portfolio['holdings'][i] * data['Close'][i]
-
-    # Calculate holding value
-    start_price = data.iloc[0]['Close']
-    end_price = data.iloc[-1]['Close']
-    value_if_held = initial_capital * (end_price / start_price)
-
-    return portfolio, trade_log, value_if_held
+    # All in below RSI 50, all out above it, only while ATR < 1000; print each trade as it happens if verbose
+    return long_only_backtest(data, buy_signal, sell_signal, initial_capital, fee=maker_taker_fee,
+                              rsi_buy_below=50, rsi_sell_above=50, max_atr=1000,
+                              on_trade=print if verbose else None)
 
 # New function to read data from CSV
 def read_data_from_csv(filename, days_at_a_time=60, offset=10):
@@ -300,6 +171,12 @@ while True:
 
     final_portfolio_value = portfolio['total'].iloc[-1]
     print(f"Final Portfolio Value: {final_portfolio_value}")
+    stats = portfolio_summary(portfolio)
+    print(f"Max Drawdown: {stats['Max_Drawdown']:.2%} over {stats['Max_Drawdown_Bars']} bars, "
+          f"Sharpe (per bar): {stats['Sharpe']:.4f}, Sortino (per bar): {stats['Sortino']:.4f}, "
+          f"Exposure: {stats['Exposure']:.2%}")
+    print("Monthly returns:")
+    print(stats['Monthly_Returns'])
 
     # Print value if held
     print(f"\nValue if held from start to end: {value_if_held}")
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+
+# Performance statistics of a backtest from its equity curve (the portfolio's total column) and its position,
+# each a few whole-array NumPy passes, so they are cheap enough to compute for every run of a sweep.
+#
+# Sharpe and Sortino ratios are per bar unless periods_per_year is given (see bars_per_year), with a zero
+# risk-free rate. Positions are the invested fraction of the equity: 1 while all in, 0 while flat.
+
+def bar_returns(equity):
+    """Return of every bar after the first."""
+    equity = np.asarray(equity, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return equity[1:] / equity[:-1] - 1.0
+
+
+def bars_per_year(index):
+    """Bars per year at the median spacing of a DatetimeIndex, for annualizing the ratios."""
+    times = pd.DatetimeIndex(index).as_unit('ns').asi8
+    if len(times) < 2:
+        return np.nan
+    return pd.Timedelta(days=365.25).value / np.median(np.diff(times))
+
+
+def drawdown(equity):
+    """Drawdown on every bar as a fraction of the highest equity so far (0 at a new high)."""
+    equity = np.asarray(equity, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 1.0 - equity / np.maximum.accumulate(equity)
+
+
+def max_drawdown(equity):
+    """(deepest drawdown as a fraction of the peak, longest run of bars spent below an earlier peak)."""
+    depth = drawdown(equity)
+    n = len(depth)
+    if n == 0:
+        return 0.0, 0
+    # Bars since the equity last stood at its high
+    last_high = np.where(depth > 0, -1, np.arange(n))
+    np.maximum.accumulate(last_high, out=last_high)
+    duration = np.arange(n) - np.maximum(last_high, 0)
+    return float(np.nanmax(depth, initial=0.0)), int(duration.max())
+
+
+def sharpe_ratio(returns, periods_per_year=None):
+    """Mean over standard deviation of the returns; annualized with periods_per_year."""
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        return np.nan
+    deviation = returns.std(ddof=1)
+    ratio = returns.mean() / deviation if deviation > 0 else np.nan
+    return ratio * np.sqrt(periods_per_year) if periods_per_year else ratio
+
+
+def sortino_ratio(returns, periods_per_year=None):
+    """Mean over downside deviation (root mean square of the losses) of the returns; annualized likewise."""
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 1:
+        return np.nan
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    ratio = returns.mean() / downside if downside > 0 else np.nan
+    return ratio * np.sqrt(periods_per_year) if periods_per_year else ratio
+
+
+def exposure(position):
+    """Fraction of bars with a position."""
+    position = np.asarray(position)
+    return float(np.count_nonzero(position) / len(position)) if len(position) else 0.0
+
+
+def turnover(position):
+    """Total position change in multiples of the equity: an all-in round trip counts 2."""
+    position = np.asarray(position, dtype=np.float64)
+    return float(np.abs(np.diff(position, prepend=0.0)).sum())
+
+
+def invested_fraction(portfolio):
+    """Position of a backtest's portfolio frame: the share of the total held in the asset."""
+    total = portfolio['total'].to_numpy(dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = 1.0 - portfolio['cash'].to_numpy(dtype=np.float64) / total
+    return np.where(total > 0, fraction, 0.0)
+
+
+def period_returns(equity, index, freq='M'):
+    """
+    Return of every calendar period (freq 'M' for months, 'Y' for years) present in index, from the equity at
+    the end of the previous period, or at the first bar for the first one. A Series indexed by period.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    # Calendar months or years as integers, straight from the datetime64 values
+    codes = index.to_numpy().astype('datetime64[%s]' % freq).astype(np.int64)
+    ends = np.append(np.flatnonzero(codes[1:] != codes[:-1]), len(codes) - 1) if len(codes) else np.empty(0, int)
+    end_values = equity[ends]
+    start_values = np.concatenate((equity[:1], end_values[:-1]))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.Series(end_values / start_values - 1.0, index=index[ends].to_period(freq), name='Return')
+
+
+def summarize(equity, position=None, periods_per_year=None):
+    """
+    Total_Return, Max_Drawdown, Max_Drawdown_Bars, Sharpe and Sortino of an equity curve, plus Exposure and
+    Turnover when its position is given.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    returns = bar_returns(equity)
+    depth, duration = max_drawdown(equity)
+    stats = {
+        'Total_Return': equity[-1] / equity[0] - 1.0 if len(equity) and equity[0] else np.nan,
+        'Max_Drawdown': depth,
+        'Max_Drawdown_Bars': duration,
+        'Sharpe': sharpe_ratio(returns, periods_per_year),
+        'Sortino': sortino_ratio(returns, periods_per_year),
+    }
+    if position is not None:
+        stats['Exposure'] = exposure(position)
+        stats['Turnover'] = turnover(position)
+    return stats
+
+
+def portfolio_summary(portfolio, annualize=False):
+    """
+    summarize() of a backtest's portfolio frame (holdings, cash, total), with Monthly_Returns and
+    Yearly_Returns Series; annualize scales the ratios by the index's bars per year.
+    """
+    equity = portfolio['total'].to_numpy(dtype=np.float64)
+    periods_per_year = bars_per_year(portfolio.index) if annualize else None
+    stats = summarize(equity, invested_fraction(portfolio), periods_per_year)
+    stats['Monthly_Returns'] = period_returns(equity, portfolio.index, 'M')
+    stats['Yearly_Returns'] = period_returns(equity, portfolio.index, 'Y')
+    return stats
@@ -3,6 +3,10 @@ import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backtest import run_strategy
+from strategies import MacdCrossover
 
 # Define the cryptocurrency symbol
 crypto_symbol = "BTC-USD"
@@ -18,99 +22,14 @@ btc_data = pd.read_csv(csv_file_path, index_col=0, parse_dates=True)
 #btc_data = pd.read_excel(excel_file_path, index_col=0, parse_dates=True)
 
 
-def compute_rsi(data, window=21):
-    delta = data.diff()
-    up, down = delta.clip(lower=0), -1 * delta.clip(upper=0)
-    roll_up = up.rolling(window).mean()
-    roll_down = down.rolling(window).mean()
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def compute_atr(data, window=14):
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    return true_range.rolling(window).mean()
-
 def trading_strategy(data, initial_capital):
-    # Calculate MACD and Signal Line indicators
-    exp1 = data['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = exp1 - exp2
-    data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-
-    # Calculate RSI
-    data['RSI'] = compute_rsi(data['Close'])
-
-    # Generate signals
-    buy_signal = (data['MACD'] > data['Signal_Line']) & (data['RSI'] < 35)
-    sell_signal = (data['MACD'] < data['Signal_Line']) & (data['RSI'] > 55)
-
-    # Calculate ATR for volatility
-    data['ATR'] = compute_atr(data)
-
-    # Initialize portfolio
-    portfolio = pd.DataFrame(index=data.index)
-    portfolio['holdings'] = np.zeros(len(data))
-    portfolio['cash'] = np.zeros(len(data))
-    portfolio['cash'][0] = initial_capital
-    portfolio['trades'] = 0  # Counter for trades
-
-    # Initialize the DataFrame to store trade details
-    trade_log = []
-
-    trade_dates = []  # To store the dates of trades for plotting
-
-    last_trade_price = 999999  # To store the price of the last trade
-
-    for i in range(1, len(data)):
-        # Limit to two trades per week
-        if portfolio['trades'][i-1] < 2:
-            if buy_signal[i] and portfolio['cash'][i-1] > 0 and data['Close'][i] < last_trade_price:
-                portfolio['holdings'][i] = portfolio['cash'][i-1] / data['Close'][i]
-                portfolio['cash'][i] = 0
-                portfolio['trades'][i] = portfolio['trades'][i-1] + 1
-                btc_amount = portfolio['cash'][i - 1] / data['Close'][i]
-                trade_log.append({
-                    'Date': data.index[i],
-                    'Action': 'Buy',
-                    'Price': data['Close'][i],
-                    'BTC_Amount': btc_amount,
-                    'Cash_Used': portfolio['cash'][i - 1]
-                })
-                last_trade_price = data['Close'][i]
-                trade_dates.append(data.index[i])  # Record trade date
-            elif sell_signal[i] and portfolio['holdings'][i-1] > 0 and data['Close'][i] > last_trade_price:
-                portfolio['cash'][i] = portfolio['holdings'][i-1] * data['Close'][i]
-                portfolio['holdings'][i] = 0
-                portfolio['trades'][i] = portfolio['trades'][i-1] + 1
-                btc_amount = portfolio['holdings'][i-1]
-                trade_log.append({
-                    'Date': data.index[i],
-                    'Action': 'Sell',
-                    'Price': data['Close'][i],
-                    'BTC_Amount': btc_amount,
-                    'Cash_Gained': btc_amount * data['Close'][i]
-                })
-                trade_dates.append(data.index[i])  # Record trade date
-                last_trade_price = data['Close'][i]
-            else:
-                portfolio['holdings'][i] = portfolio['holdings'][i-1]
-                portfolio['cash'][i] = portfolio['cash'][i-1]
-        else:
-            portfolio['trades'][i] = 0  # Reset trade counter weekly
-
-
-        #portfolio['cash'][i] = max(portfolio['cash'][i], portfolio['cash'][i-1])
-        #portfolio['holdings'][i] = max(portfolio['holdings'][i], portfolio['holdings'][i-1])
-
-    portfolio['total'] = portfolio['cash'] + portfolio['holdings'] * data['Close']
+    # MACD crossover with RSI(21) filters, trading only past the last trade price, at most two trades in a row
+    strategy = MacdCrossover(rsi_window=21, buy_rsi_below=35, sell_rsi_above=55, price_guard=True)
+    portfolio, trade_log = run_strategy(strategy, data, initial_capital, max_trade_streak=2)
+    trade_dates = trade_log.dates  # To store the dates of trades for plotting
 
     # Convert trade log to DataFrame and save to Excel
-    trade_df = pd.DataFrame(trade_log)
+    trade_df = trade_log.to_frame()
     trade_df.to_excel('./trade_log.xlsx', index=False)
 
     return portfolio, trade_dates
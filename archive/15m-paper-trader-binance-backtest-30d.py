@@ -1,6 +1,10 @@
 import pandas as pd
 from binance.client import Client
 from datetime import datetime, timedelta
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import indicators
 
 # Replace 'your_api_key' and 'your_api_secret' with your Binance API credentials
 api_key = 'your_api_key'
@@ -52,24 +56,8 @@ def calculate_macd(data, fast_period=12, slow_period=26, signal_period=9):
     return data
 
 def identify_macd_peaks_and_troughs_using_derivative(data):
-    # Calculate the first derivative (rate of change) of the MACD Histogram
-    data['MACD_Histogram_Delta'] = data['MACD_Histogram'].diff()
-
-    # Initialize columns for peaks and troughs
-    data['Green_Peak'] = False
-    data['Red_Peak'] = False
-
-    # Iterate over the data
-    for i in range(1, len(data)):
-        # Check for Green Peak (MACD Histogram peak)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] > 0 and data['MACD_Histogram_Delta'].iloc[i] <= 0:
-            data['Green_Peak'].iloc[i] = True
-
-        # Check for Red Trough (MACD Histogram trough)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] < 0 and data['MACD_Histogram_Delta'].iloc[i] >= 0:
-            data['Red_Peak'].iloc[i] = True
-
-    return data
+    # Flag each turn on the bar that confirms it
+    return indicators.identify_macd_peaks_and_troughs_using_derivative(data, confirmed=True)
 
 # Backtesting function
 
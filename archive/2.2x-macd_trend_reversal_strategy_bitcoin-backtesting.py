@@ -3,6 +3,10 @@ import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backtest import run_strategy
+from strategies import LastTradePriceGuard, macd_trend_reversal
 
 # Define the cryptocurrency symbol
 crypto_symbol = "BTC-USD"
@@ -18,23 +22,6 @@ excel_file_path = 'bitcoin_data_5yr.xlsx'
 btc_data = pd.read_excel(excel_file_path, index_col=0, parse_dates=True)
 
 
-def compute_rsi(data, window=14):
-    delta = data.diff()
-    up, down = delta.clip(lower=0), -1 * delta.clip(upper=0)
-    roll_up = up.rolling(window).mean()
-    roll_down = down.rolling(window).mean()
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def compute_atr(data, window=14):
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    return true_range.rolling(window).mean()
-
 def simple_sell_signal(data):
     #simple sell signal based on MACD and RSI
     sell_signal = (data['MACD'] < data['Signal_Line']) & (data['RSI'] > 55)
@@ -76,98 +63,15 @@ def sell_signal_macd_peaks(data):
     return data['Red_Peak']
 
 def trading_strategy(data, initial_capital):
-    # Calculate MACD and Signal Line indicators
-    exp1 = data['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = exp1 - exp2
-    data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-
-    # Calculate RSI
-    data['RSI'] = compute_rsi(data['Close'])
-
-    # Generate MACD histogram
-    data['MACD_Histogram'] = data['MACD'] - data['Signal_Line']
-
-    # Generate signals based on MACD and RSI
-    # buy_signal = simple_buy_signal(data)
-    # sell_signal = simple_sell_signal(data)
-
-    # Generate signals based on MACD peaks
-    buy_signal = buy_signal_macd_peaks(data)
-    sell_signal = sell_signal_macd_peaks(data)
-
-    # Calculate ATR for volatility
-    data['ATR'] = compute_atr(data)
-
-    # Initialize portfolio
-    portfolio = pd.DataFrame(index=data.index)
-    portfolio['holdings'] = np.zeros(len(data))
-    portfolio['cash'] = np.zeros(len(data))
-    portfolio['cash'][0] = initial_capital
-    portfolio['trades'] = 0  # Counter for trades
-
-    # Initialize the DataFrame to store trade details
-    trade_log = []
-
-    trade_dates = []  # To store the dates of trades for plotting
-
-    last_trade_price = 999999  # To store the price of the last trade
-
-    for i in range(1, len(data)):
-        # Limit to two trades per week
-        if portfolio['trades'][i-1] < 2:
-            if buy_signal[i] and portfolio['cash'][i-1] > 0 and data['RSI'][i] < 30:
-            #if buy_signal[i] and portfolio['cash'][i - 1] > 0 and last_trade_price > data['Close'][i] and data['RSI'][i] < 50:
-
-                portfolio['holdings'][i] = portfolio['cash'][i-1] / data['Close'][i]
-                portfolio['cash'][i] = 0
-                portfolio['trades'][i] = portfolio['trades'][i-1] + 1
-                btc_amount = portfolio['cash'][i - 1] / data['Close'][i]
-                trade_log.append({
-                    'Date': data.index[i],
-                    'Action': 'Buy',
-                    'Price': data['Close'][i],
-                    'BTC_Amount': btc_amount,
-                    'Cash_Used': portfolio['cash'][i - 1]
-                })
-                last_trade_price = data['Close'][i]
-                trade_dates.append(data.index[i])  # Record trade date
-            #elif sell_signal[i] and portfolio['holdings'][i - 1] > 0 and data['RSI'][i] > 70:
-            elif sell_signal[i] and portfolio['holdings'][i-1] > 0 and last_trade_price < data['Close'][i] and data['RSI'][i] > 70:
-                portfolio['cash'][i] = portfolio['holdings'][i-1] * data['Close'][i]
-                portfolio['holdings'][i] = 0
-                portfolio['trades'][i] = portfolio['trades'][i-1] + 1
-                btc_amount = portfolio['holdings'][i-1]
-                trade_log.append({
-                    'Date': data.index[i],
-                    'Action': 'Sell',
-                    'Price': data['Close'][i],
-                    'BTC_Amount': btc_amount,
-                    'Cash_Gained': btc_amount * data['Close'][i]
-                })
-                trade_dates.append(data.index[i])  # Record trade date
-                last_trade_price = data['Close'][i]
-            else:
-                portfolio['holdings'][i] = portfolio['holdings'][i-1]
-                portfolio['cash'][i] = portfolio['cash'][i-1]
-        else:
-            portfolio['trades'][i] = 0  # Reset trade counter weekly
-
-
-        #portfolio['cash'][i] = max(portfolio['cash'][i], portfolio['cash'][i-1])
-        #portfolio['holdings'][i] = max(portfolio['holdings'][i], portfolio['holdings'][i-1])
-
-    portfolio['total'] = portfolio['cash'] + portfolio['holdings'] * data['Close']
-
-    # Convert trade log to DataFrame and save to Excel
-    trade_df = pd.DataFrame(trade_log)
-    trade_df.to_excel('./trade_log.xlsx', index=False)
-
-    return portfolio, trade_log
+    # Buy on MACD trend reversals up with RSI < 30, sell on reversals down with RSI > 70 above the last trade
+    # price, at most two trades in a row
+    strategy = LastTradePriceGuard(macd_trend_reversal, buy_rsi_below=30, sell_rsi_above=70, guard_buy=False)
+    return run_strategy(strategy, data, initial_capital, max_trade_streak=2)
 
 # Backtesting loop
 initial_capital = 100  # Define initial capital
 results = [] # To store the results of each backtest
+print_trade_logs = False  # Print every window's trades, not just its final value
 
 # The last date in the data
 last_date = btc_data.index[-1]
@@ -189,8 +93,8 @@ for month_offset in range(0, 60, 1):  # 60 months in 5 years
 # Print results and trade logs
 for result in results:
     print(f"Backtest from {result[0].date()} to {result[1].date()}")
-    print("Trade Log:")
-    for trade in result[3]:
-        print(trade)
+    if print_trade_logs:
+        print("Trade Log:")
+        print(result[3].to_frame())
     print(f"Final Portfolio Value: {result[2]}\n")
 
@@ -3,6 +3,10 @@ import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backtest import run_strategy
+from strategies import VolumeSizedCrossover
 
 # Define the cryptocurrency symbol
 crypto_symbol = "BTC-USD"
@@ -13,111 +17,13 @@ btc_data.to_csv('./bitcoin_data_2y.csv')  # Save to CSV
 
 volatility_threshold = 10  # This is an example value, you should adjust it based on your strategy
 
-def compute_rsi(data, window=14):
-    delta = data.diff()
-    up, down = delta.clip(lower=0), -1 * delta.clip(upper=0)
-    roll_up = up.rolling(window).mean()
-    roll_down = down.rolling(window).mean()
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def compute_atr(data, window=14):
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    return true_range.rolling(window).mean()
-
 def trading_strategy(data, initial_capital):
-    # Calculate MACD and Signal Line indicators
-    exp1 = data['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = exp1 - exp2
-    data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-
-    # Calculate RSI
-    data['RSI'] = compute_rsi(data['Close'])
-
-    # Calculate ATR for volatility
-    data['ATR'] = compute_atr(data)
-
-    # Calculate the average volume over the past 30 days
-    data['Avg_Volume_30d'] = data['Volume'].rolling(window=30).mean()
-
-    # Initialize portfolio
-    portfolio = pd.DataFrame(index=data.index)
-    portfolio['holdings'] = np.zeros(len(data))
-    portfolio['cash'] = np.zeros(len(data))
-    portfolio['cash'][0] = initial_capital
-    portfolio['trades'] = 0  # Counter for trades
-    portfolio['total'] = np.zeros(len(data))  # Initialize 'total' column
-
-
-    # Initialize the DataFrame to store trade details
-    trade_log = []
-
-    # Generate signals
-    buy_signal = (data['MACD'] > data['Signal_Line']) & (data['RSI'] < 70)
-    sell_signal = (data['MACD'] < data['Signal_Line']) & (data['RSI'] > 30)
-
-    for i in range(1, len(data)):
-        # Calculate the proportion of capital to use based on previous day's volume
-        volume_proportion = data['Volume'][i-1] / data['Avg_Volume_30d'][i-1] if i > 1 else 1
-        volume_proportion = min(max(volume_proportion, 0.1), 1)  # Ensure the proportion is between 0.1 and 1
-
-        # Limit to two trades per week and check volatility threshold
-        if portfolio['trades'][i-1] < 2 and data['ATR'][i] > volatility_threshold:
-            if buy_signal[i] and portfolio['cash'][i-1] > 0:
-                # Calculate investment amount based on volume proportion
-                invest_amount = portfolio['cash'][i-1] * volume_proportion
-                btc_amount = invest_amount / data['Close'][i]
-
-                # Log the trade
-                trade_log.append({
-                    'Date': data.index[i],
-                    'Action': 'Buy',
-                    'Price': data['Close'][i],
-                    'BTC_Amount': btc_amount,
-                    'Cash_Used': invest_amount
-                })
-
-                # Execute the buy
-                portfolio['holdings'][i] = btc_amount
-                portfolio['cash'][i] = portfolio['cash'][i-1] - invest_amount
-                portfolio['trades'][i] = portfolio['trades'][i-1] + 1
-
-            elif sell_signal[i] and portfolio['holdings'][i-1] > 0:
-                # Calculate selling amount based on volume proportion
-                sell_amount = portfolio['holdings'][i-1] * volume_proportion
-                cash_gained = sell_amount * data['Close'][i]
-
-                # Log the trade
-                trade_log.append({
-                    'Date': data.index[i],
-                    'Action': 'Sell',
-                    'Price': data['Close'][i],
-                    'BTC_Amount': sell_amount,
-                    'Cash_Gained': cash_gained
-                })
-
-                # Execute the sell
-                portfolio['cash'][i] = portfolio['cash'][i-1] + cash_gained
-                portfolio['holdings'][i] = portfolio['holdings'][i-1] - sell_amount
-                portfolio['trades'][i] = portfolio['trades'][i-1] + 1
-
-        else:
-            # Carry forward the previous day's values if no trade
-            portfolio['cash'][i] = portfolio['cash'][i-1]
-            portfolio['holdings'][i] = portfolio['holdings'][i-1]
-            portfolio['trades'][i] = 0
-
-        # Calculate the total value of the portfolio
-        portfolio['total'][i] = portfolio['cash'][i] + portfolio['holdings'][i] * data['Close'][i]
+    # MACD crossover sized by volume while ATR > volatility_threshold, at most two trades in a row
+    strategy = VolumeSizedCrossover(volatility_threshold)
+    portfolio, trade_log = run_strategy(strategy, data, initial_capital, max_trade_streak=2)
 
     # Convert trade log to DataFrame and save to Excel
-    trade_df = pd.DataFrame(trade_log)
+    trade_df = trade_log.to_frame()
     trade_df.to_excel('./trade_log.xlsx', index=False)
 
     return portfolio
@@ -1,5 +1,9 @@
 import re
 from GoogleNews import GoogleNews
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import calculate_rsi, calculate_macd
 
 # Function to get stock market trend
 def get_stock_market_trend():
@@ -28,21 +32,3 @@ def get_stock_market_trend():
         articles.append((item['title'], category))
 
     return positive_count, negative_count, neutral_count, articles
-
-# Function to calculate RSI
-def calculate_rsi(data, window=14):
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-# Function to calculate MACD
-def calculate_macd(data, n_slow=26, n_fast=12, n_signal=9):
-    ema_fast = data['Close'].ewm(span=n_fast, adjust=False).mean()
-    ema_slow = data['Close'].ewm(span=n_slow, adjust=False).mean()
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=n_signal, adjust=False).mean()
-    return macd_line, signal_line
-
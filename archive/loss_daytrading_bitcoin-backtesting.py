@@ -4,6 +4,10 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from pandas.errors import SettingWithCopyWarning
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import calculate_atr, calculate_support_resistance_levels, compute_rsi, identify_macd_peaks_and_troughs
+from stop_loss import AtrStopLoss
 
 # Define the cryptocurrency symbol
 crypto_symbol = "BTC-USD"
@@ -24,31 +28,6 @@ def calculate_holding_value(data, start_date, end_date, initial_investment):
     end_price = data.loc[end_date, 'Close']
     return initial_investment * (end_price / start_price)
 
-def calculate_atr(data, window=14):
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    atr = true_range.rolling(window).mean()
-    return atr
-
-def calculate_support_resistance(data, end_date, lookback_period=20):
-    relevant_data = data[:end_date].tail(lookback_period)
-    support = relevant_data['Low'].min()
-    resistance = relevant_data['High'].max()
-    return support, resistance
-
-
-def compute_rsi(data, window=14):
-    delta = data.diff()
-    up, down = delta.clip(lower=0), -1 * delta.clip(upper=0)
-    roll_up = up.rolling(window).mean()
-    roll_down = down.rolling(window).mean()
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
 def simple_sell_signal(data):
     #simple sell signal based on MACD and RSI
     sell_signal = (data['MACD'] < data['Signal_Line']) & (data['RSI'] > 65)
@@ -59,24 +38,6 @@ def simple_buy_signal(data):
     buy_signal = (data['MACD'] > data['Signal_Line']) & (data['RSI'] < 35)
     return buy_signal
 
-def identify_macd_peaks_and_troughs(data):
-    """
-    Identify MACD histogram peaks and troughs.
-    Green peaks: Points where the histogram is higher than both the previous and next bars.
-    Red troughs: Points where the histogram is lower than both the previous and next bars.
-    """
-    data['Green_Peak'] = False
-    data['Red_Peak'] = False
-
-    for i in range(1, len(data) - 1):
-        if data['MACD_Histogram'].iloc[i] > data['MACD_Histogram'].iloc[i-1] and data['MACD_Histogram'].iloc[i] > data['MACD_Histogram'].iloc[i+1]:
-            data['Green_Peak'].iloc[i] = True
-        elif data['MACD_Histogram'].iloc[i] < data['MACD_Histogram'].iloc[i-1] and data['MACD_Histogram'].iloc[i] < data['MACD_Histogram'].iloc[i+1]:
-            data['Red_Peak'].iloc[i] = True
-
-    return data
-
-
 def buy_signal_macd_peaks(data):
     """
     Generate buy signals based on MACD peaks.
@@ -115,6 +76,9 @@ def trading_strategy(data, initial_capital):
     buy_signal = buy_signal_macd_peaks(data)
     sell_signal = sell_signal_macd_peaks(data)
 
+    # Rolling support and resistance for every bar in one O(n) pass
+    support_levels, resistance_levels = calculate_support_resistance_levels(data)
+
     # Initialize portfolio
     portfolio = pd.DataFrame(index=data.index)
     portfolio['holdings'] = np.zeros(len(data))
@@ -139,13 +103,12 @@ def trading_strategy(data, initial_capital):
 
     # Initialize the DataFrame to store trade details
     trade_log = []
-    last_buy_price = None
-    stop_loss_atr = None
-
     trade_dates = []  # To store the dates of trades for plotting
 
     last_trade_price = 999999  # To store the price of the last trade
     atr_window = 14  # or whatever your ATR window is
+    # One causal ATR series for the whole run instead of recomputing it on every bar
+    atr_stop = AtrStopLoss(calculate_atr(data, window=atr_window), atr_multiplier)
 
     for i in range(1, len(data)):
         date = data.index[i]
@@ -156,8 +119,8 @@ def trading_strategy(data, initial_capital):
         # Update the total portfolio value with the current day's closing price
         portfolio['total'][i] = portfolio['cash'][i] + portfolio['holdings'][i] * data['Close'][i]
 
-        # Calculate support and resistance up to the current date
-        support, resistance = calculate_support_resistance(data, data.index[i])
+        # Support and resistance up to the current date
+        support, resistance = support_levels[i], resistance_levels[i]
 
         if i%30 == 0:
             monthly_portfolio_values.append(portfolio['total'].loc[data.index[i]])
@@ -166,19 +129,14 @@ def trading_strategy(data, initial_capital):
         if i <= atr_window:
             continue  # Skip early entries where ATR can't be calculated
 
-        current_data_slice = data.iloc[:i + 1]
-        current_atr_series = calculate_atr(current_data_slice)
-        current_atr = current_atr_series.iloc[-1]
-        if stop_loss_atr is not None:
-            # Update stop loss price
-            stop_loss_atr = last_buy_price - atr_multiplier * current_atr
+        # Update stop loss price
+        atr_stop.update(i)
 
         if buy_signal[i] and portfolio['cash'][i-1] > 0 and data['RSI'][i] < 45:
             # Calculate the cost of the transaction including fees
             transaction_cost = portfolio['cash'][i - 1] * maker_taker_fee
             portfolio['cash'][i - 1] -=  transaction_cost
-            last_buy_price = data['Close'][i]  # Update the last buy price
-            stop_loss_atr = last_buy_price - atr_multiplier * current_atr
+            atr_stop.enter(i, data['Close'][i])  # Update the last buy price and the stop
             portfolio['holdings'][i] = portfolio['cash'][i-1] / data['Close'][i]
             portfolio['cash'][i] = 0
             portfolio['trades'][i] = portfolio['trades'][i-1] + 1
@@ -202,9 +160,8 @@ def trading_strategy(data, initial_capital):
             amount_after_sale = transaction_value - transaction_cost
 
             # Check if the transaction is profitable (after fees) before selling
-            if amount_after_sale > portfolio['holdings'][i - 1] * last_buy_price:
-                last_buy_price = None  # Reset the last buy price
-                stop_loss_atr = None
+            if amount_after_sale > portfolio['holdings'][i - 1] * atr_stop.last_buy_price:
+                atr_stop.exit()  # Reset the last buy price
                 portfolio['cash'][i] = amount_after_sale
                 portfolio['holdings'][i] = 0
                 portfolio['trades'][i] = portfolio['trades'][i - 1] + 1
@@ -222,9 +179,9 @@ def trading_strategy(data, initial_capital):
                 })
                 trade_dates.append(data.index[i])  # Record trade date
                 last_trade_price = data['Close'][i]
-        elif last_buy_price and stop_loss_atr and portfolio['holdings'][i - 1] > 0:
+        elif atr_stop.is_active() and portfolio['holdings'][i - 1] > 0:
             # Check for stop loss
-            if data['Close'][i] < stop_loss_atr:
+            if atr_stop.is_hit(data['Close'][i]):
                 # Trigger stop loss
                 portfolio['cash'][i] = portfolio['holdings'][i - 1] * data['Close'][i]
                 portfolio['holdings'][i] = 0
@@ -241,8 +198,7 @@ def trading_strategy(data, initial_capital):
                     'Support': support,
                     'Resistance': resistance
                 })
-                last_buy_price = None  # Reset the last buy price
-                stop_loss_atr = None
+                atr_stop.exit()  # Reset the last buy price
                 trade_dates.append(data.index[i])  # Record trade date
 
     portfolio['total'] = portfolio['cash'] + portfolio['holdings'] * data['Close']
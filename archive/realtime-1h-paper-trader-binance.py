@@ -9,6 +9,9 @@ import numpy as np
 from pandas.errors import SettingWithCopyWarning
 from datetime import datetime, timedelta
 import time
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import add_indicator_columns, identify_macd_peaks_and_troughs_using_derivative
 
 
 # Use your own API key and secret
@@ -29,54 +32,6 @@ start_trading_time = datetime(2023, 12, 12, 9, 0, 0)
 initial_capital = 5000
 current_time = datetime.now()
 
-def calculate_atr(data, window=14):
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    atr = true_range.rolling(window).mean()
-    return atr
-
-# Function to calculate MACD and signal line
-def calculate_macd(df):
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    df['MACD'] = macd
-    df['Signal'] = signal
-    df['MACD_Histogram'] = macd - signal
-
-def compute_rsi(data, window=7): #using window=14 gives poor results, 7 is good for 15m data
-    delta = data.diff()
-    up, down = delta.clip(lower=0), -1 * delta.clip(upper=0)
-    roll_up = up.rolling(window).mean()
-    roll_down = down.rolling(window).mean()
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def identify_macd_peaks_and_troughs_using_derivative(data): #Using normal macd crossover gives poor results
-    # Calculate the first derivative (rate of change) of the MACD Histogram
-    data['MACD_Histogram_Delta'] = data['MACD_Histogram'].diff()
-
-    # Initialize columns for peaks and troughs
-    data['Green_Peak'] = False
-    data['Red_Peak'] = False
-
-    # Iterate over the data
-    for i in range(2, len(data)):
-        # Check for Green Peak (MACD Histogram peak)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] > 0 and data['MACD_Histogram_Delta'].iloc[i] <= 0:
-            data['Green_Peak'].iloc[i - 1] = True
-
-        # Check for Red Trough (MACD Histogram trough)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] < 0 and data['MACD_Histogram_Delta'].iloc[i] >= 0:
-            data['Red_Peak'].iloc[i - 1] = True
-
-    return data
-
 def buy_signal_macd_peaks(data):
     identify_macd_peaks_and_troughs_using_derivative(data)
     return data['Red_Peak']
@@ -119,9 +74,8 @@ def read_data_from_csv(filename):
     return data_df
 
 def calculate_macd_and_rsi(df):
-    calculate_macd(df)
-    df['RSI'] = compute_rsi(df['Close'])  # Make sure to assign the Series returned by compute_rsi
-    df['ATR'] = calculate_atr(df)
+    # MACD, Signal, MACD_Histogram, RSI and ATR in one pass over the OHLC columns
+    add_indicator_columns(df, rsi_window=7)
     identify_macd_peaks_and_troughs_using_derivative(df)
 
 # Plotting function
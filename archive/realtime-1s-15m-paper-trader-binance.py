@@ -6,6 +6,10 @@ import time
 import numpy as np
 from binance import Client
 from pandas.errors import SettingWithCopyWarning
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import indicators
+from compact_data import read_price_csv
 
 # Initialize Binance client
 api_key = os.getenv('BINANCE_API_KEY')
@@ -16,25 +20,6 @@ symbol = 'BTCUSDT'
 csv_filename = 'BTCUSDT-1s-data.csv'
 
 # Technical analysis functions
-def calculate_atr(data, window=14):
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    atr = true_range.rolling(window).mean()
-    return atr
-
-# Function to calculate MACD and signal line
-def calculate_macd(df):
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    df['MACD'] = macd
-    df['Signal'] = signal
-    df['MACD_Histogram'] = macd - signal
-
 def compute_rsi(data, window=14):
     delta = data['Close'].diff()
     gain = delta.where(delta > 0, np.nan)
@@ -49,35 +34,9 @@ def compute_rsi(data, window=14):
     data['RSI'] = rsi
     return data
 
-def compute_rsi2(data, window=7):
-    delta = data['Close'].diff()
-    up, down = delta.clip(lower=0), -1 * delta.clip(upper=0)
-    roll_up = up.rolling(window).mean()
-    roll_down = down.rolling(window).mean()
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
-    data['RSI'] = rsi
-    return rsi
-
 def identify_macd_peaks_and_troughs_using_derivative(data):
-    # Calculate the first derivative (rate of change) of the MACD Histogram
-    data['MACD_Histogram_Delta'] = data['MACD_Histogram'].diff()
-
-    # Initialize columns for peaks and troughs
-    data['Green_Peak'] = False
-    data['Red_Peak'] = False
-
-    # Iterate over the data
-    for i in range(1, len(data)):
-        # Check for Green Peak (MACD Histogram peak)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] > 0 and data['MACD_Histogram_Delta'].iloc[i] <= 0:
-            data['Green_Peak'].iloc[i] = True
-
-        # Check for Red Trough (MACD Histogram trough)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] < 0 and data['MACD_Histogram_Delta'].iloc[i] >= 0:
-            data['Red_Peak'].iloc[i] = True
-
-    return data
+    # Flag each turn on the bar that confirms it
+    return indicators.identify_macd_peaks_and_troughs_using_derivative(data, confirmed=True)
 
 # Function to get current ticker price
 def get_current_price():
@@ -98,9 +57,9 @@ def update_csv(filename, price):
         # Append new data
         combined_data = pd.concat([existing_data, new_data])
         # Update indicators
-        calculate_macd(combined_data)
+        indicators.add_macd_columns(combined_data)
         #compute_rsi(combined_data)
-        compute_rsi2(combined_data)
+        combined_data['RSI'] = indicators.compute_rsi(combined_data['Close'], window=7)
         identify_macd_peaks_and_troughs_using_derivative(combined_data)
         # Save updated data
         combined_data.to_csv(filename)
@@ -121,7 +80,7 @@ def make_trading_decision(df):
 
     # Process only the latest data
     i = len(df) - 1
-    current_price, price_time = df['Close'].iloc[-1], df.index[-1]
+    current_price, price_time = float(df['Close'].iloc[-1]), df.index[-1]
 
     # Print the latest price and indicators
     print("Current Price,Buy=Red Peak, Sell=Green Peak, RSI(buy<30,sell>70))")
@@ -201,7 +160,8 @@ last_sell_price = -999999
 while True:
     current_price = get_current_price()
     update_csv(csv_filename, current_price)
-    df = pd.read_csv(csv_filename, index_col='Timestamp', parse_dates=True)
+    # float32 columns and bool flags: the 1s history grows by 86,400 rows a day
+    df = read_price_csv(csv_filename, compact=True)
     decision = make_trading_decision(df)
     # Calculate the latest total value based on the latest holdings and current price
     latest_holdings = portfolio['holdings'].iloc[-1]
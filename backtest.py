@@ -0,0 +1,263 @@
+import numpy as np
+import pandas as pd
+
+from trade_log import BUY, SELL, STOP_LOSS, TAKE_PROFIT, TradeLog
+
+
+def filter_signals(buy_signal, sell_signal, rsi, atr, rsi_buy_below, rsi_sell_above, max_atr):
+    """Bars where a buy or sell would pass the RSI and ATR filters of the GOLDMINE loop (bar 0 never trades)."""
+    calm = atr < max_atr
+    buy_ok = np.asarray(buy_signal, dtype=bool) & (rsi < rsi_buy_below) & calm
+    sell_ok = np.asarray(sell_signal, dtype=bool) & (rsi > rsi_sell_above) & calm
+    buy_ok[:1] = False
+    sell_ok[:1] = False
+    return buy_ok, sell_ok
+
+
+def _portfolio_columns(close, initial_capital, trade_bars, holdings_after, cash_after):
+    """holdings, cash and total arrays from the state after each trade, held constant until the next one."""
+    n = len(close)
+    last_trade = np.full(n, -1)
+    last_trade[trade_bars] = np.arange(len(trade_bars))
+    np.maximum.accumulate(last_trade, out=last_trade)
+    traded = last_trade >= 0
+    position = np.maximum(last_trade, 0)
+    holdings = np.where(traded, np.append(holdings_after, 0.0)[position], 0.0)
+    cash = np.where(traded, np.append(cash_after, 0.0)[position], float(initial_capital))
+    total = cash + holdings * close
+    # Bar 0 is never revalued
+    total[:1] = cash[:1]
+    return holdings, cash, total
+
+
+def _portfolio_frame(index, *columns):
+    holdings, cash, total = columns
+    return pd.DataFrame({'holdings': holdings, 'cash': cash, 'total': total}, index=index)
+
+
+def long_only_backtest(data, buy_signal, sell_signal, initial_capital, fee=0.00075, rsi_buy_below=50,
+                       rsi_sell_above=50, max_atr=1000, on_trade=None):
+    """
+    The all-in/all-out MACD peak backtest of the GOLDMINE scripts, on NumPy arrays.
+    Buy with all cash on a buy_signal bar while flat if RSI < rsi_buy_below and ATR < max_atr; sell everything on a
+    sell_signal bar while long if RSI > rsi_sell_above and ATR < max_atr; fee is charged on both sides.
+
+    The columns are pulled out once, only bars that pass the filters are visited, and the portfolio frame is
+    built at the end, so the result is the same as the per-bar pandas loop without its per-bar indexing cost.
+    on_trade, if given, is called with each trade log entry as it is made (e.g. print; leave it off in batch runs).
+    Returns (portfolio, trade_log, value_if_held) like trading_strategy, with trade_log a trade_log.TradeLog.
+    """
+    close = data['Close'].to_numpy(dtype=np.float64)
+    rsi = data['RSI'].to_numpy(dtype=np.float64)
+    atr = data['ATR'].to_numpy(dtype=np.float64)
+    buy_ok, sell_ok = filter_signals(buy_signal, sell_signal, rsi, atr, rsi_buy_below, rsi_sell_above, max_atr)
+
+    times = data.index.as_unit('ns').asi8
+    cash = initial_capital
+    holdings = 0.0
+    position_held = False
+    trade_bars, holdings_after, cash_after = [], [], []
+    trade_log = TradeLog(tz=data.index.tz)
+    for i in np.flatnonzero(buy_ok | sell_ok):
+        if not position_held and buy_ok[i] and cash > 0:
+            transaction_cost = cash * fee
+            invest_amount = cash - transaction_cost
+            holdings = invest_amount / close[i]
+            cash = 0.0
+            trade_log.record(times[i], BUY, close[i], invest_amount / close[i], invest_amount, RSI=rsi[i], ATR=atr[i])
+            position_held = True
+        elif position_held and sell_ok[i] and holdings > 0:
+            sell_value = holdings * close[i]
+            transaction_cost = sell_value * fee
+            cash = sell_value - transaction_cost
+            trade_log.record(times[i], SELL, close[i], holdings, sell_value, RSI=rsi[i], ATR=atr[i])
+            holdings = 0.0
+            position_held = False
+        else:
+            continue
+        trade_bars.append(i)
+        holdings_after.append(holdings)
+        cash_after.append(cash)
+        if on_trade is not None:
+            on_trade(trade_log[-1])
+
+    portfolio = _portfolio_frame(data.index, *_portfolio_columns(close, initial_capital,
+                                                                 np.array(trade_bars, dtype=np.int64),
+                                                                 np.array(holdings_after), np.array(cash_after)))
+
+    # Calculate holding value
+    start_price = data.iloc[0]['Close']
+    end_price = data.iloc[-1]['Close']
+    value_if_held = initial_capital * (end_price / start_price)
+
+    return portfolio, trade_log, value_if_held
+
+
+def flip_positions(buy_ok, sell_ok):
+    """
+    Position (1 long, 0 flat) after each bar of the all-in/all-out flip, with no loop over bars.
+    A buy-only bar leaves the position long and a sell-only bar leaves it flat, whatever it was before;
+    a bar that is both flips it. So the position is the last one-sided bar's side, flipped once per
+    two-sided bar since. Returns (position, entries, exits) with the entry and exit bar indices.
+    """
+    buy_ok = np.asarray(buy_ok, dtype=bool)
+    sell_ok = np.asarray(sell_ok, dtype=bool)
+    n = len(buy_ok)
+    one_sided = buy_ok != sell_ok
+    flips = np.cumsum(buy_ok & sell_ok)
+    last = np.where(one_sided, np.arange(n), -1)
+    np.maximum.accumulate(last, out=last)
+    seen = last >= 0
+    anchor = np.maximum(last, 0)
+    side = np.where(seen, buy_ok[anchor], False)
+    flips_since = flips - np.where(seen, flips[anchor], 0)
+    position = (side ^ (flips_since & 1).astype(bool)).astype(np.int8)
+
+    change = np.diff(position, prepend=np.int8(0))
+    return position, np.flatnonzero(change > 0), np.flatnonzero(change < 0)
+
+
+def flip_backtest_arrays(close, buy_ok, sell_ok, initial_capital, fee=0.00075):
+    """
+    Vectorized long_only_backtest on filtered masks: (position, entries, exits, holdings, cash, total).
+    Cash compounds by one factor per round trip, so values equal the trade-by-trade loop to rounding.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if initial_capital > 0:
+        position, entries, exits = flip_positions(buy_ok, sell_ok)
+    else:
+        # The loop only buys with cash > 0
+        position, entries, exits = np.zeros(len(close), dtype=np.int8), np.empty(0, int), np.empty(0, int)
+
+    kept = 1.0 - fee
+    cash_after_sell = initial_capital * np.cumprod(kept * close[exits] / close[entries[:len(exits)]] * kept)
+    cash_before_buy = np.concatenate(([initial_capital], cash_after_sell))[:len(entries)]
+    holdings_after_buy = (cash_before_buy - cash_before_buy * fee) / close[entries]
+
+    trade_bars = np.empty(len(entries) + len(exits), dtype=np.int64)
+    trade_bars[0::2], trade_bars[1::2] = entries, exits
+    holdings_after = np.zeros(len(trade_bars))
+    holdings_after[0::2] = holdings_after_buy
+    cash_after = np.zeros(len(trade_bars))
+    cash_after[1::2] = cash_after_sell
+
+    holdings, cash, total = _portfolio_columns(close, initial_capital, trade_bars, holdings_after, cash_after)
+    return position, entries, exits, holdings, cash, total
+
+
+def flip_backtest(data, buy_signal, sell_signal, initial_capital, fee=0.00075, rsi_buy_below=50,
+                  rsi_sell_above=50, max_atr=1000):
+    """
+    long_only_backtest without a loop over bars or trades, for sweeps that need the equity curve rather than
+    the trade log. Takes the same arguments and makes the same trades;
+    returns (position, entries, exits, portfolio) with position a Series and portfolio the same frame.
+    """
+    close = data['Close'].to_numpy(dtype=np.float64)
+    rsi = data['RSI'].to_numpy(dtype=np.float64)
+    atr = data['ATR'].to_numpy(dtype=np.float64)
+    buy_ok, sell_ok = filter_signals(buy_signal, sell_signal, rsi, atr, rsi_buy_below, rsi_sell_above, max_atr)
+    position, entries, exits, holdings, cash, total = flip_backtest_arrays(close, buy_ok, sell_ok, initial_capital,
+                                                                           fee)
+    portfolio = _portfolio_frame(data.index, holdings, cash, total)
+    return pd.Series(position, index=data.index, name='Position'), entries, exits, portfolio
+
+
+# Pluggable strategies: a Strategy turns the frame into plain arrays once, and run_strategy asks it for an
+# order on each bar that can trade. The engine keeps the portfolio in Python floats and builds the portfolio
+# frame at the end, like long_only_backtest.
+
+class PortfolioState:
+    """What a strategy may look at when deciding: cash, holdings, the last buy/sell price and the entry bar."""
+
+    def __init__(self, initial_capital):
+        self.cash = float(initial_capital)
+        self.holdings = 0.0
+        self.last_trade_price = 999999
+        self.entry_bar = None
+
+
+class Strategy:
+    """
+    Base class for run_strategy. prepare() returns the arrays decide() reads (at least 'Close');
+    bars() the bar positions that may trade, in order; decide() the order for bar i: None, or (action, fraction)
+    with action BUY (spend fraction of the cash), SELL, STOP_LOSS or TAKE_PROFIT (sell fraction of the
+    holdings), filled at the bar's close, or (action, fraction, price) to fill at price instead;
+    details() extra trade log fields.
+    """
+
+    def prepare(self, data):
+        return {'Close': data['Close'].to_numpy(dtype=np.float64)}
+
+    def bars(self, features):
+        return range(1, len(features['Close']))
+
+    def decide(self, i, features, state):
+        return None
+
+    def details(self, i, features):
+        """Extra trade log fields for a trade on bar i."""
+        return {}
+
+
+def run_strategy(strategy, data, initial_capital, fee=0.0, max_trade_streak=None, on_trade=None):
+    """
+    Run strategy over the OHLC frame data. fee is charged on both sides; with max_trade_streak, the bar after
+    that many trades on consecutive bars never trades (the scripts' "two trades" limit).
+    BUY and SELL fills set state.last_trade_price; stop-loss and take-profit fills do not, as in the stop-loss
+    scripts.
+    on_trade, if given, is called with each trade log entry as it is made.
+    Returns (portfolio, trade_log) with the holdings, cash and total columns and a trade_log.TradeLog.
+    """
+    features = strategy.prepare(data)
+    close = features['Close']
+    times = data.index.as_unit('ns').asi8
+    state = PortfolioState(initial_capital)
+    trade_bars, holdings_after, cash_after = [], [], []
+    trade_log = TradeLog(tz=data.index.tz)
+    streak = 0
+    previous = 0
+    for i in strategy.bars(features):
+        if i != previous + 1:
+            # The bars in between cannot trade
+            streak = 0
+        previous = i
+        if max_trade_streak is not None and streak >= max_trade_streak:
+            streak = 0
+            continue
+        order = strategy.decide(i, features, state)
+        if order is None:
+            streak = 0
+            continue
+
+        action, fraction = order[:2]
+        price = order[2] if len(order) > 2 else close[i]
+        if action == BUY:
+            spent = state.cash * fraction
+            invest_amount = spent - spent * fee
+            amount = invest_amount / price
+            state.cash -= spent
+            state.holdings += amount
+            state.last_trade_price, state.entry_bar = price, i
+            cash = invest_amount
+        else:
+            amount = state.holdings * fraction
+            sell_value = amount * price
+            state.cash += sell_value - sell_value * fee
+            state.holdings -= amount
+            if action == SELL:
+                state.last_trade_price = price
+            if state.holdings <= 0:
+                state.entry_bar = None
+            cash = sell_value
+        trade_log.record(times[i], action, price, amount, cash, **strategy.details(i, features))
+        streak += 1
+        trade_bars.append(i)
+        holdings_after.append(state.holdings)
+        cash_after.append(state.cash)
+        if on_trade is not None:
+            on_trade(trade_log[-1])
+
+    portfolio = _portfolio_frame(data.index, *_portfolio_columns(close, initial_capital,
+                                                                 np.array(trade_bars, dtype=np.int64),
+                                                                 np.array(holdings_after), np.array(cash_after)))
+    return portfolio, trade_log
@@ -0,0 +1,604 @@
+import os
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from benchmark_indicators import make_random_walk_data, time_call
+from analytics import period_returns, portfolio_summary, summarize
+from backtest import flip_backtest, long_only_backtest, run_strategy
+from fills import IntrabarFills
+from indicator_graph import IndicatorGraph
+from indicators import calculate_atr, calculate_macd, compute_rsi, identify_macd_peaks_and_troughs, rolling_mean
+from stop_loss import AtrStopLoss
+from sweep import parameter_grid, parameter_sweep
+from timeframes import resample_ohlc
+from trade_log import BUY, SELL, STOP_LOSS, TAKE_PROFIT, TradeLog
+from walk_forward import walk_forward
+from multi_start import multi_start_backtest
+from strategies import (AtrStopLossStrategy, LastTradePriceGuard, MacdCrossover, MacdPeakFlip, VolumeSizedCrossover,
+                        macd_trend_reversal, signed_macd_extrema)
+
+
+def make_strategy_data(n_bars, seed=42):
+    """Synthetic 15m frame with the RSI(7)/ATR(7) columns and MACD peak signals of the GOLDMINE backtest."""
+    data = make_random_walk_data(n_bars, seed)
+    indicators = IndicatorGraph(data)
+    indicators.assign({'RSI': 'RSI(7)', 'ATR': 'ATR(7)'})
+    # Scale the ATR so the < 1000 cap filters some bars, as it does on BTC
+    data['ATR'] *= 20
+    return data, indicators['Red_Peak'], indicators['Green_Peak']
+
+
+def loop_backtest(data, buy_signal, sell_signal, initial_capital, maker_taker_fee=0.00075, rsi_buy_below=50,
+                  rsi_sell_above=50, max_atr=1000):
+    # Per-bar pandas loop of trading_strategy, writing with .iat so it also works under copy-on-write
+    portfolio = pd.DataFrame(index=data.index)
+    portfolio['holdings'] = np.zeros(len(data))
+    portfolio['cash'] = np.zeros(len(data))
+    portfolio.iat[0, 1] = initial_capital
+    portfolio['total'] = portfolio['cash']
+    trade_log = []
+    position_held = False
+
+    for i in range(1, len(data)):
+        portfolio.iat[i, 0] = portfolio['holdings'].iloc[i - 1]
+        portfolio.iat[i, 1] = portfolio['cash'].iloc[i - 1]
+        date = data.index[i]
+
+        if (buy_signal.iloc[i] and not position_held and portfolio['cash'].iloc[i - 1] > 0
+                and data['RSI'].iloc[i] < rsi_buy_below and data['ATR'].iloc[i] < max_atr):
+            transaction_cost = portfolio['cash'].iloc[i - 1] * maker_taker_fee
+            invest_amount = portfolio['cash'].iloc[i - 1] - transaction_cost
+            portfolio.iat[i, 0] = invest_amount / data['Close'].iloc[i]
+            portfolio.iat[i, 1] = 0
+            trade_log.append({'Date': date, 'Action': 'Buy', 'Price': data['Close'].iloc[i],
+                              'BTC_Amount': invest_amount / data['Close'].iloc[i], 'Cash_Used': invest_amount,
+                              'RSI': data['RSI'].iloc[i], 'ATR': data['ATR'].iloc[i]})
+            position_held = True
+        elif (sell_signal.iloc[i] and position_held and portfolio['holdings'].iloc[i - 1] > 0
+              and data['RSI'].iloc[i] > rsi_sell_above and data['ATR'].iloc[i] < max_atr):
+            sell_value = portfolio['holdings'].iloc[i - 1] * data['Close'].iloc[i]
+            transaction_cost = sell_value * maker_taker_fee
+            portfolio.iat[i, 1] = sell_value - transaction_cost
+            portfolio.iat[i, 0] = 0
+            trade_log.append({'Date': date, 'Action': 'Sell', 'Price': data['Close'].iloc[i],
+                              'BTC_Amount': portfolio['holdings'].iloc[i - 1], 'Cash_Gained': sell_value,
+                              'RSI': data['RSI'].iloc[i], 'ATR': data['ATR'].iloc[i]})
+            position_held = False
+
+        portfolio.iat[i, 2] = portfolio['cash'].iloc[i] + portfolio['holdings'].iloc[i] * data['Close'].iloc[i]
+
+    value_if_held = initial_capital * (data.iloc[-1]['Close'] / data.iloc[0]['Close'])
+    return portfolio, trade_log, value_if_held
+
+
+def assert_same_backtest(expected, actual):
+    expected_portfolio, expected_log, expected_held = expected
+    portfolio, trade_log, value_if_held = actual
+    assert np.array_equal(expected_portfolio.to_numpy(), portfolio.to_numpy(), equal_nan=True)
+    assert expected_log == list(trade_log)
+    assert expected_held == value_if_held
+
+
+def benchmark_backtest_core(n_bars=5 * 365 * 96, initial_capital=5000):
+    data, buy_signal, sell_signal = make_strategy_data(n_bars)
+    loop_result = loop_backtest(data, buy_signal, sell_signal, initial_capital)
+    core_result = long_only_backtest(data, buy_signal, sell_signal, initial_capital)
+    assert_same_backtest(loop_result, core_result)
+
+    result = {
+        'Bars': n_bars,
+        'Trades': len(core_result[1]),
+        'Loop (s)': time_call(loop_backtest, data, buy_signal, sell_signal, initial_capital),
+        'Core (s)': time_call(long_only_backtest, data, buy_signal, sell_signal, initial_capital, repeat=5),
+    }
+    result['Speedup'] = result['Loop (s)'] / result['Core (s)']
+    print(result)
+    return pd.DataFrame([result])
+
+
+def benchmark_flip_solver(n_bars=5 * 365 * 96, initial_capital=5000):
+    data, buy_signal, sell_signal = make_strategy_data(n_bars)
+    portfolio, trade_log, _ = long_only_backtest(data, buy_signal, sell_signal, initial_capital)
+    position, entries, exits, flip_portfolio = flip_backtest(data, buy_signal, sell_signal, initial_capital)
+    # Same trades, and the same values up to the rounding of compounding per round trip
+    trade_bars = data.index.get_indexer(trade_log.dates)
+    assert np.array_equal(trade_bars, np.sort(np.concatenate([entries, exits])))
+    assert np.allclose(portfolio.to_numpy(), flip_portfolio.to_numpy(), rtol=1e-10, atol=0)
+
+    result = {
+        'Bars': n_bars,
+        'Trades': len(trade_log),
+        'Trade loop (s)': time_call(long_only_backtest, data, buy_signal, sell_signal, initial_capital, repeat=5),
+        'Vectorized (s)': time_call(flip_backtest, data, buy_signal, sell_signal, initial_capital, repeat=5),
+    }
+    result['Speedup'] = result['Trade loop (s)'] / result['Vectorized (s)']
+    print(result)
+    return pd.DataFrame([result])
+
+
+def benchmark_parameter_sweep(n_bars=5 * 365 * 96, workers=None):
+    data = make_random_walk_data(n_bars)
+    grid = parameter_grid(rsi_buy_below=[30, 40, 50], rsi_sell_above=[50, 60, 70], max_atr=[50, 1000],
+                          rsi_window=[7, 14], atr_window=[7, 14], fee=[0.00075, 0.001])
+    workers = workers or os.cpu_count() or 1
+    serial = parameter_sweep(data, grid, workers=1)
+    assert serial.equals(parameter_sweep(data, grid, workers=workers))
+
+    result = {
+        'Bars': n_bars,
+        'Runs': len(grid),
+        'Workers': workers,
+        '1 worker (s)': time_call(parameter_sweep, data, grid, 5000, 1),
+        'Pool (s)': time_call(parameter_sweep, data, grid, 5000, workers),
+    }
+    result['Speedup'] = result['1 worker (s)'] / result['Pool (s)']
+    print(result)
+    return pd.DataFrame([result])
+
+
+def benchmark_walk_forward(n_bars=5 * 365 * 96, workers=None):
+    data = make_random_walk_data(n_bars)
+
+    def rerun_per_window():
+        # The script's old loop: slice each window and compute its indicators from scratch
+        results = []
+        for start_date in pd.date_range(start=data.index.max() - pd.DateOffset(days=300), end=data.index.min(),
+                                        freq='-30D'):
+            end_date = start_date + pd.DateOffset(days=300)
+            chunk = data[(data.index >= start_date) & (data.index <= end_date)].copy()
+            indicators = IndicatorGraph(chunk)
+            indicators.assign({'RSI': 'RSI(7)', 'ATR': 'ATR(7)'})
+            portfolio, _, value_if_held = long_only_backtest(chunk, indicators['Red_Peak'], indicators['Green_Peak'],
+                                                             5000)
+            results.append({'Start Date': start_date, 'End Date': end_date,
+                            'Final Portfolio Value': portfolio['total'].iloc[-1], 'Value if Held': value_if_held})
+        return pd.DataFrame(results)
+
+    workers = workers or os.cpu_count() or 1
+    expected = rerun_per_window()
+    assert expected.equals(walk_forward(data, workers=1))
+    assert expected.equals(walk_forward(data, workers=workers))
+
+    result = {
+        'Bars': n_bars,
+        'Windows': len(expected),
+        'Workers': workers,
+        'Rerun per window (s)': time_call(rerun_per_window),
+        'Walk-forward (s)': time_call(walk_forward, data, 300, 30, 5000, 0, workers),
+    }
+    result['Speedup'] = result['Rerun per window (s)'] / result['Walk-forward (s)']
+    print(result)
+    return pd.DataFrame([result])
+
+
+def loop_multi_start(data, start_dates, initial_capital, buy_rsi_below, sell_rsi_above, atr_multiplier=None,
+                     atr_window=14, skip_bars=0, max_trade_streak=None):
+    # The 25x and 0.8x scripts' trading_strategy rerun on each start's slice, with the streak rule of run_strategy
+    results = []
+    for start_date in start_dates:
+        chunk = data[data.index >= start_date].copy()
+        exp1 = chunk['Close'].ewm(span=12, adjust=False).mean()
+        exp2 = chunk['Close'].ewm(span=26, adjust=False).mean()
+        chunk['MACD'] = exp1 - exp2
+        chunk['Signal_Line'] = chunk['MACD'].ewm(span=9, adjust=False).mean()
+        chunk['MACD_Histogram'] = chunk['MACD'] - chunk['Signal_Line']
+        chunk['RSI'] = compute_rsi(chunk['Close'])
+        identify_macd_peaks_and_troughs(chunk)
+        close, rsi = chunk['Close'].to_numpy(), chunk['RSI'].to_numpy()
+        buy_signal, sell_signal = chunk['Red_Peak'].to_numpy(), chunk['Green_Peak'].to_numpy()
+        atr_stop = AtrStopLoss(calculate_atr(chunk, window=atr_window), atr_multiplier) if atr_multiplier else None
+        cash, holdings, last_trade_price, streak, trades = float(initial_capital), 0.0, 999999, 0, 0
+        for i in range(1, len(chunk)):
+            if max_trade_streak is not None and streak >= max_trade_streak:
+                streak = 0
+                continue
+            if i <= skip_bars:
+                streak = 0
+                continue
+            if atr_stop is not None:
+                atr_stop.update(i)
+            if buy_signal[i] and cash > 0 and rsi[i] < buy_rsi_below:
+                if atr_stop is not None:
+                    atr_stop.enter(i, close[i])
+                holdings, cash, last_trade_price = cash / close[i], 0.0, close[i]
+            elif sell_signal[i] and holdings > 0 and last_trade_price < close[i] and rsi[i] > sell_rsi_above:
+                cash, holdings, last_trade_price = holdings * close[i], 0.0, close[i]
+                if atr_stop is not None:
+                    atr_stop.exit()
+            elif atr_stop is not None and atr_stop.is_active() and holdings > 0 and atr_stop.is_hit(close[i]):
+                cash, holdings = holdings * close[i], 0.0
+                atr_stop.exit()
+            else:
+                streak = 0
+                continue
+            streak += 1
+            trades += 1
+        results.append({'Start Date': start_date, 'Final Portfolio Value': cash + holdings * close[-1],
+                        'Trades': trades})
+    return pd.DataFrame(results)
+
+
+def benchmark_multi_start(n_bars=5 * 365 * 96, month_offsets=range(0, 60, 2)):
+    data = make_random_walk_data(n_bars)
+    start_dates = [data.index[0] + pd.DateOffset(months=month_offset) for month_offset in month_offsets]
+    settings = dict(buy_rsi_below=45, sell_rsi_above=65, atr_multiplier=2, skip_bars=14)
+
+    def rerun_per_start():
+        return pd.concat([multi_start_backtest(data[data.index >= start_date], [start_date], 5000, **settings)
+                          for start_date in start_dates], ignore_index=True)
+
+    def one_pass():
+        return multi_start_backtest(data, start_dates, 5000, **settings)
+
+    separate, together = rerun_per_start(), one_pass()
+    assert (separate['Trades'] == together['Trades']).all()
+    assert np.allclose(separate['Final Portfolio Value'], together['Final Portfolio Value'], rtol=1e-10, atol=0)
+
+    # The scripts' own per-start loops on a small frame: the 25x settings, then every extremum trading with a
+    # tight stop so that the two-trade streak rule binds
+    small = make_random_walk_data(20 * 96)
+    small_starts = [small.index[0] + pd.DateOffset(days=day) for day in range(0, 10, 2)]
+    streak_settings = dict(buy_rsi_below=101, sell_rsi_above=-1, atr_multiplier=0.5, max_trade_streak=2)
+    for small_settings in (settings, streak_settings):
+        expected = loop_multi_start(small, small_starts, 5000, **small_settings)
+        actual = multi_start_backtest(small, small_starts, 5000, **small_settings)
+        assert (expected['Trades'] == actual['Trades']).all()
+        assert np.allclose(expected['Final Portfolio Value'], actual['Final Portfolio Value'], rtol=1e-10, atol=0)
+
+    result = {
+        'Bars': n_bars,
+        'Starts': len(start_dates),
+        'Rerun per start (s)': time_call(rerun_per_start),
+        'One pass (s)': time_call(one_pass),
+    }
+    result['Speedup'] = result['Rerun per start (s)'] / result['One pass (s)']
+    print(result)
+    return pd.DataFrame([result])
+
+
+def loop_strategy(data, rule, initial_capital, max_trade_streak=None, first_bar=1):
+    # Per-bar loop of the scripts' trading_strategy: rule(i, cash, holdings, last_trade_price) returns None or
+    # (action, fraction) to fill at the close; the bar after max_trade_streak trades in a row sits out
+    close = data['Close'].to_numpy()
+    n = len(close)
+    holdings_column, cash_column, total = np.zeros(n), np.zeros(n), np.zeros(n)
+    cash, holdings, last_trade_price = float(initial_capital), 0.0, 999999
+    cash_column[0] = total[0] = cash
+    trade_bars = []
+    streak = 0
+    for i in range(1, n):
+        if max_trade_streak is not None and streak >= max_trade_streak:
+            order = None
+        else:
+            order = rule(i, cash, holdings, last_trade_price) if i >= first_bar else None
+        if order is None:
+            streak = 0
+        else:
+            action, fraction = order
+            if action == BUY:
+                spent = cash * fraction
+                cash -= spent
+                holdings += spent / close[i]
+            else:
+                amount = holdings * fraction
+                cash += amount * close[i]
+                holdings -= amount
+            if action in (BUY, SELL):
+                last_trade_price = close[i]
+            trade_bars.append(i)
+            streak += 1
+        holdings_column[i], cash_column[i] = holdings, cash
+        total[i] = cash + holdings * close[i]
+    portfolio = pd.DataFrame({'holdings': holdings_column, 'cash': cash_column, 'total': total}, index=data.index)
+    return portfolio, trade_bars
+
+
+def crossover_rule(data, rsi_window=14, buy_rsi_below=70, sell_rsi_above=30, price_guard=False,
+                   volatility_threshold=None, volume_window=30):
+    # 100xinbitcoin and 1.4x, or bitcoininvestonvolume with volatility_threshold
+    close = data['Close'].to_numpy()
+    macd_line, signal_line = (line.to_numpy() for line in calculate_macd(data))
+    rsi = compute_rsi(data['Close'], rsi_window).to_numpy()
+    atr = calculate_atr(data).to_numpy()
+    average_volume = rolling_mean(data['Volume'].to_numpy(), volume_window)
+
+    def rule(i, cash, holdings, last_trade_price):
+        if volatility_threshold is not None and not atr[i] > volatility_threshold:
+            return None
+        size = 1.0
+        if volatility_threshold is not None and i >= volume_window:
+            size = min(max(data['Volume'].iat[i - 1] / average_volume[i - 1], 0.1), 1.0)
+        if (macd_line[i] > signal_line[i] and rsi[i] < buy_rsi_below and cash > 0
+                and (not price_guard or close[i] < last_trade_price)):
+            return BUY, size
+        if (macd_line[i] < signal_line[i] and rsi[i] > sell_rsi_above and holdings > 0
+                and (not price_guard or close[i] > last_trade_price)):
+            return SELL, size
+        return None
+    return rule
+
+
+def guarded_histogram_rule(data, trend_reversal=False):
+    # macd_peak_strategy_bitcoin (troughs below zero, peaks above), or the 2.2x trend reversal with trend_reversal
+    close = data['Close'].to_numpy()
+    macd_line, signal_line = (line.to_numpy() for line in calculate_macd(data))
+    histogram = macd_line - signal_line
+
+    def rule(i, cash, holdings, last_trade_price):
+        h, previous = histogram[i], histogram[i - 1]
+        if trend_reversal:
+            buy = h > 0 and (h > previous or previous < 0)
+            sell = h < 0 and (h < previous or previous > 0)
+        else:
+            following = histogram[i + 1] if i + 1 < len(histogram) else np.nan
+            buy = h < 0 and h < previous and h < following
+            sell = h > 0 and h > previous and h > following
+        if buy and cash > 0 and close[i] < last_trade_price:
+            return BUY, 1.0
+        if sell and holdings > 0 and close[i] > last_trade_price:
+            return SELL, 1.0
+        return None
+    return rule
+
+
+def atr_stop_rule(data, atr_multiplier=2, buy_rsi_below=45, sell_rsi_above=65):
+    # The 25x stop-loss loop: trailing stop atr_multiplier ATRs under the buy price, checked at the close
+    close = data['Close'].to_numpy()
+    macd_line, signal_line = (line.to_numpy() for line in calculate_macd(data))
+    histogram = macd_line - signal_line
+    rsi = compute_rsi(data['Close']).to_numpy()
+    atr = calculate_atr(data).to_numpy()
+    position = {'buy_price': None}
+
+    def rule(i, cash, holdings, last_trade_price):
+        buy_price = position['buy_price']
+        following = histogram[i + 1] if i + 1 < len(histogram) else np.nan
+        trough = histogram[i] < histogram[i - 1] and histogram[i] < following
+        peak = histogram[i] > histogram[i - 1] and histogram[i] > following
+        if trough and rsi[i] < buy_rsi_below and cash > 0:
+            position['buy_price'] = close[i]
+            return BUY, 1.0
+        if peak and rsi[i] > sell_rsi_above and holdings > 0 and last_trade_price < close[i]:
+            position['buy_price'] = None
+            return SELL, 1.0
+        if buy_price is not None and holdings > 0 and close[i] < buy_price - atr_multiplier * atr[i]:
+            position['buy_price'] = None
+            return STOP_LOSS, 1.0
+        return None
+    return rule
+
+
+def benchmark_strategies(n_bars=5 * 365 * 96, initial_capital=5000):
+    """
+    Every ported strategy through run_strategy on the same synthetic 15m frame. All but the GOLDMINE peak flip
+    are checked against a per-bar loop of their script's rules.
+    """
+    data = make_random_walk_data(n_bars)[['Open', 'High', 'Low', 'Close']]
+    data['Volume'] = np.random.default_rng(7).lognormal(10, 1, n_bars)
+    strategies = {
+        'GOLDMINE peak flip': (MacdPeakFlip(), None, None),
+        '100x crossover': (MacdCrossover(), 2, (crossover_rule(data), 1)),
+        '1.4x crossover': (MacdCrossover(rsi_window=21, buy_rsi_below=35, sell_rsi_above=55, price_guard=True), 2,
+                           (crossover_rule(data, 21, 35, 55, price_guard=True), 1)),
+        'MACD peaks': (LastTradePriceGuard(signed_macd_extrema), 2, (guarded_histogram_rule(data), 1)),
+        '2.2x trend reversal': (LastTradePriceGuard(macd_trend_reversal), 2,
+                                (guarded_histogram_rule(data, trend_reversal=True), 1)),
+        'Volume sized': (VolumeSizedCrossover(volatility_threshold=100), 2,
+                         (crossover_rule(data, volatility_threshold=100), 1)),
+        'ATR stop loss': (AtrStopLossStrategy(), None, (atr_stop_rule(data), 15)),
+    }
+    results = []
+    for name, (strategy, max_trade_streak, reference) in strategies.items():
+        portfolio, trade_log = run_strategy(strategy, data, initial_capital, max_trade_streak=max_trade_streak)
+        if reference is not None:
+            # Same trade bars and the same portfolio, bit for bit, as the per-bar loop of the script's rules
+            rule, first_bar = reference
+            expected_portfolio, expected_bars = loop_strategy(data, rule, initial_capital, max_trade_streak,
+                                                              first_bar)
+            assert np.array_equal(data.index.get_indexer(trade_log.dates), expected_bars), name
+            assert np.array_equal(expected_portfolio.to_numpy(), portfolio.to_numpy()), name
+        results.append({
+            'Strategy': name,
+            'Bars': n_bars,
+            'Trades': len(trade_log),
+            'Final Value': portfolio['total'].iloc[-1],
+            'Time (s)': time_call(lambda: run_strategy(strategy, data, initial_capital,
+                                                       max_trade_streak=max_trade_streak)),
+        })
+    result = pd.DataFrame(results)
+    print(result)
+    return result
+
+
+def scan_fill(data, sub_data, i, stop, target, bar_interval='15min'):
+    # IntrabarFills.fill by brute force: walk bar i's sub-bars in order, stop before target on the same one
+    bar = data.iloc[i]
+    start = data.index[i]
+    end = data.index[i + 1] if i + 1 < len(data) else start + pd.Timedelta(bar_interval)
+    if sub_data is not None:
+        inside = sub_data.iloc[sub_data.index.searchsorted(start):sub_data.index.searchsorted(end)]
+        for time, sub_bar in zip(inside.index, inside.to_dict('records')):
+            # Tick frames only have Close
+            low, high, open_ = (sub_bar.get(name, sub_bar['Close']) for name in ('Low', 'High', 'Open'))
+            if stop is not None and low <= stop:
+                return STOP_LOSS, min(stop, open_), time
+            if target is not None and high >= target:
+                return TAKE_PROFIT, max(target, open_), time
+    if stop is not None and bar['Low'] <= stop:
+        return STOP_LOSS, min(stop, bar['Open']), start
+    if target is not None and bar['High'] >= target:
+        return TAKE_PROFIT, max(target, bar['Open']), start
+    return None
+
+
+def benchmark_intrabar_fills(days=90, initial_capital=5000, seed=42, n_checks=1000):
+    """
+    The ATR stop strategy with a 1% target filled at the close, against 15m High/Low, and resolved on 1s ticks.
+    Five years of 15m bars are 20x the bars here; the fill cost grows with the bars, not the ticks.
+    IntrabarFills.fill is first checked against scan_fill on n_checks random bars, alone and on ticks and 1m bars.
+    """
+    n_ticks = days * 86400
+    rng = np.random.default_rng(seed)
+    ticks = pd.DataFrame({'Close': 30000 * np.exp(np.cumsum(rng.normal(0, 0.0002, n_ticks)))},
+                         index=pd.date_range('2023-01-01', periods=n_ticks, freq='1s'))
+    data = resample_ohlc(ticks.assign(Open=ticks['Close'], High=ticks['Close'], Low=ticks['Close']), '15min')
+
+    # Random bars and levels around each bar's open: either level may be missing, touched, opened through, or
+    # touched on the same sub-bar as the other
+    minutes = resample_ohlc(ticks.assign(Open=ticks['Close'], High=ticks['Close'], Low=ticks['Close']), '1min')
+    bars = rng.integers(0, len(data), n_checks)
+    opens = data['Open'].to_numpy()[bars]
+    stops = opens * (1 + rng.uniform(-0.006, 0.001, n_checks))
+    targets = opens * (1 + rng.uniform(-0.001, 0.006, n_checks))
+    stops[rng.random(n_checks) < 0.2] = np.nan
+    targets[rng.random(n_checks) < 0.2] = np.nan
+    for sub_data in (None, ticks, minutes):
+        fills = IntrabarFills(data, sub_data)
+        for i, stop, target in zip(bars, stops, targets):
+            stop, target = (None if np.isnan(level) else level for level in (stop, target))
+            assert fills.fill(i, stop, target) == scan_fill(data, sub_data, i, stop, target), (i, stop, target)
+
+    runs = {
+        'Close': lambda: AtrStopLossStrategy(take_profit=0.01),
+        'High/Low': lambda: AtrStopLossStrategy(take_profit=0.01, fills=IntrabarFills(data)),
+        '1s ticks': lambda: AtrStopLossStrategy(take_profit=0.01, fills=IntrabarFills(data, ticks)),
+    }
+    results = []
+    for name, make_strategy in runs.items():
+        portfolio, trade_log = run_strategy(make_strategy(), data, initial_capital)
+        results.append({
+            'Fills': name,
+            'Bars': len(data),
+            'Ticks': n_ticks,
+            'Trades': len(trade_log),
+            'Final Value': portfolio['total'].iloc[-1],
+            # Includes locating every bar's ticks
+            'Time (s)': time_call(lambda: run_strategy(make_strategy(), data, initial_capital), repeat=3),
+        })
+    result = pd.DataFrame(results)
+    print(result)
+    return result
+
+
+def benchmark_trade_log(n_trades=1_000_000, seed=42):
+    """Appending n_trades to a list of trade dicts versus a TradeLog, and the memory each ends up holding."""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2019-01-01', periods=n_trades, freq='15min')
+    time_values = times.as_unit('ns').asi8
+    prices, amounts = rng.uniform(20000, 60000, n_trades), rng.uniform(0, 1, n_trades)
+    rsi = rng.uniform(0, 100, n_trades)
+
+    def dict_log():
+        trade_log = []
+        for k in range(n_trades):
+            trade_log.append({'Date': times[k], 'Action': 'Buy' if k % 2 == 0 else 'Sell', 'Price': prices[k],
+                              'BTC_Amount': amounts[k], 'Cash_Used': prices[k] * amounts[k], 'RSI': rsi[k]})
+        return trade_log
+
+    def columnar_log():
+        trade_log = TradeLog()
+        for k in range(n_trades):
+            trade_log.record(time_values[k], BUY if k % 2 == 0 else SELL, prices[k], amounts[k],
+                             prices[k] * amounts[k], RSI=rsi[k])
+        return trade_log
+
+    def uncached_frame():
+        columnar._frame = None
+        return columnar.to_frame()
+
+    tracemalloc.start()
+    dict_log()
+    dict_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    columnar = columnar_log()
+    columnar_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = {
+        'Trades': n_trades,
+        'Dict append (s)': time_call(dict_log),
+        'Columnar append (s)': time_call(columnar_log),
+        'To DataFrame (s)': time_call(uncached_frame),
+        'Dict peak (MB)': dict_bytes / 1e6,
+        'Columnar peak (MB)': columnar_bytes / 1e6,
+    }
+    print(result)
+    return pd.DataFrame([result])
+
+
+def benchmark_analytics(n_bars=5 * 365 * 96, initial_capital=5000):
+    """The analytics of one 5-year 15m backtest, against the pandas way of computing them."""
+    data, buy_signal, sell_signal = make_strategy_data(n_bars)
+    portfolio, trade_log, _ = long_only_backtest(data, buy_signal, sell_signal, initial_capital)
+    total = portfolio['total']
+
+    def pandas_stats():
+        drawdown = 1 - total / total.cummax()
+        underwater = drawdown > 0
+        returns = total.pct_change()
+        position = portfolio['holdings'] * data['Close'] / total
+        return {
+            'Max_Drawdown': drawdown.max(),
+            'Max_Drawdown_Bars': underwater.groupby((~underwater).cumsum()).cumsum().max(),
+            'Sharpe': returns.mean() / returns.std(),
+            'Sortino': returns.mean() / np.sqrt((returns.clip(upper=0) ** 2).mean()),
+            'Exposure': (position != 0).mean(),
+            'Turnover': position.diff().fillna(position.iloc[0]).abs().sum(),
+            'Monthly_Returns': total.resample('ME').last().pct_change(),
+            'Yearly_Returns': total.resample('YE').last().pct_change(),
+        }
+
+    def pandas_period_returns(equity, freq):
+        # Last value of every period with bars, NaN included, over the previous one's (the first bar's for the first)
+        periods = equity.index.to_period(freq)
+        ends = equity.groupby(periods).tail(1)
+        ends.index = ends.index.to_period(freq)
+        starts = ends.shift(1)
+        starts.iloc[0] = equity.iloc[0]
+        return (ends / starts - 1).rename('Return')
+
+    stats = portfolio_summary(portfolio)
+    expected = pandas_stats()
+    assert np.isclose(stats['Max_Drawdown'], expected['Max_Drawdown'])
+    assert stats['Max_Drawdown_Bars'] == expected['Max_Drawdown_Bars']
+    for name in ('Sharpe', 'Sortino', 'Exposure', 'Turnover'):
+        assert np.isclose(stats[name], expected[name]), name
+    # Past the first period, the pandas resample of a gapless curve gives the same returns
+    for name in ('Monthly_Returns', 'Yearly_Returns'):
+        assert np.allclose(stats[name].to_numpy()[1:], expected[name].to_numpy()[1:]), name
+
+    # Period returns of a moving curve (the close) with a missing month and NaNs, one of them at a month's last bar
+    equity = data['Close'].copy()
+    equity = equity[(equity.index < '2020-03-01') | (equity.index >= '2020-04-01')]
+    month_end = equity.index[equity.index.searchsorted(pd.Timestamp('2021-07-01')) - 1]
+    equity.loc[[equity.index[1000], month_end]] = np.nan
+    for freq in ('M', 'Y'):
+        ours = period_returns(equity.to_numpy(), equity.index, freq)
+        theirs = pandas_period_returns(equity, freq)
+        assert ours.index.equals(theirs.index), freq
+        assert np.allclose(ours.to_numpy(), theirs.to_numpy(), equal_nan=True), freq
+        assert np.array_equal(np.isnan(ours.to_numpy()), np.isnan(theirs.to_numpy())), freq
+
+    result = {
+        'Bars': n_bars,
+        'Trades': len(trade_log),
+        'pandas (s)': time_call(pandas_stats, repeat=3),
+        'portfolio_summary (s)': time_call(portfolio_summary, portfolio, repeat=3),
+        # What a sweep pays per run: arrays in, no period returns
+        'summarize (s)': time_call(summarize, total.to_numpy(), None, repeat=3),
+    }
+    result['Speedup'] = result['pandas (s)'] / result['portfolio_summary (s)']
+    print(result)
+    return pd.DataFrame([result])
+
+
+if __name__ == '__main__':
+    print(benchmark_backtest_core())
+    print(benchmark_flip_solver())
+    print(benchmark_parameter_sweep())
+    print(benchmark_walk_forward())
+    print(benchmark_multi_start())
+    print(benchmark_strategies())
+    print(benchmark_intrabar_fills())
+    print(benchmark_trade_log())
+    print(benchmark_analytics())
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from indicators import rolling_max
+
+
+def find_major_dips(close, rsi, macd_line, signal_line, window_size=5, crash_threshold=-9):
+    """
+    Flag "Major Dip" bars: the close is at least crash_threshold percent below the highest close of the
+    window_size bars before it, RSI is between 30 and 40, and MACD is below its signal line.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    n = len(close)
+    dips = np.zeros(n, dtype=bool)
+    if n <= window_size:
+        return dips
+
+    # Highest close of bars i - window_size .. i - 1
+    previous_high = rolling_max(close, window_size)[window_size - 1:n - 1]
+    with np.errstate(invalid='ignore'):
+        percent_change = (close[window_size:] - previous_high) / previous_high * 100
+    dips[window_size:] = ((percent_change <= crash_threshold) & (rsi[window_size:] >= 30) & (rsi[window_size:] <= 40)
+                          & (np.asarray(macd_line)[window_size:] < np.asarray(signal_line)[window_size:]))
+    return dips
+
+
+class DipEventIndex:
+    """
+    Sorted index of Major Dip bars for one ticker. update() only scans the bars outside the span already
+    covered (plus the window_size bars before them), and query() answers a date range with two binary searches.
+    Events are judged on the indicator values of the first frame that covered their bar.
+    """
+
+    def __init__(self, window_size=5, crash_threshold=-9):
+        self.window_size = window_size
+        self.crash_threshold = crash_threshold
+        self.times = np.empty(0, dtype=np.int64)
+        self.prices = np.empty(0)
+        self.covered = None
+
+    def _scan(self, hist, start, end):
+        # Bars start..end - 1 of hist, with the window before them for the previous highs
+        first = max(start - self.window_size, 0)
+        part = hist.iloc[first:end]
+        dips = find_major_dips(part['Close'], part['RSI'], part['MACD_Line'], part['Signal_Line'],
+                               self.window_size, self.crash_threshold)
+        dips[:start - first] = False
+        return part.index.as_unit('ns').asi8[dips], part['Close'].to_numpy(dtype=np.float64)[dips]
+
+    def update(self, hist):
+        """Add the events of a frame with Close, RSI, MACD_Line and Signal_Line columns and a datetime index."""
+        if len(hist) == 0:
+            return self
+        times = hist.index.as_unit('ns').asi8
+        if self.covered is None or times[0] > self.covered[1] or times[-1] < self.covered[0]:
+            # Nothing in common with what was scanned before: scan it all and cover just this span
+            self.covered = None
+            ranges = [(0, len(hist))]
+        else:
+            covered_start, covered_end = self.covered
+            ranges = [(0, int(np.searchsorted(times, covered_start, side='left'))),
+                      (int(np.searchsorted(times, covered_end, side='right')), len(hist))]
+
+        new_times, new_prices = [], []
+        keep = np.ones(len(self.times), dtype=bool)
+        for start, end in ranges:
+            if start < end:
+                event_times, event_prices = self._scan(hist, start, end)
+                new_times.append(event_times)
+                new_prices.append(event_prices)
+                # Events found here replace any from an earlier scan of the same bars
+                keep &= (self.times < times[start]) | (self.times > times[end - 1])
+        times_all = np.concatenate([self.times[keep]] + new_times)
+        order = np.argsort(times_all, kind='stable')
+        self.times, self.prices = times_all[order], np.concatenate([self.prices[keep]] + new_prices)[order]
+
+        # The newest bar may still be forming (today's daily candle), so the next update scans it again
+        newest_final = times[-2] if len(times) > 1 else times[0] - 1
+        if self.covered is None:
+            self.covered = (times[0], newest_final)
+        else:
+            self.covered = (min(self.covered[0], times[0]), max(self.covered[1], newest_final))
+        return self
+
+    def query(self, start, end, tz=None):
+        """Events with start <= time <= end, as a Close Series indexed by time."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if start.tz is not None:
+            tz = tz or start.tz
+            start, end = start.tz_convert('UTC').tz_localize(None), end.tz_convert('UTC').tz_localize(None)
+        first = np.searchsorted(self.times, start.as_unit('ns').value, side='left')
+        last = np.searchsorted(self.times, end.as_unit('ns').value, side='right')
+        index = pd.to_datetime(self.times[first:last], unit='ns')
+        if tz is not None:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        return pd.Series(self.prices[first:last], index=index, name='Close')
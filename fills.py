@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from trade_log import STOP_LOSS, TAKE_PROFIT
+
+
+# Stop-loss and take-profit fills for a long position, judged against each bar's High and Low instead of its
+# Close. A level the bar opens through fills at the open; otherwise at the level itself.
+#
+# A bar that touches both levels cannot say which came first. With sub_data (the 1s price CSV, or any finer
+# OHLC frame) the sub-bars of the bar are found with one searchsorted per bar up front, and the first sub-bar
+# to touch either level decides; a sub-bar that opens through a level fills at its open. Without sub_data, or
+# when both touch on the same sub-bar, the stop is assumed to fill first.
+
+def _column(data, name, fallback='Close'):
+    return data[name if name in data else fallback].to_numpy(dtype=np.float64)
+
+
+def _first_true(mask):
+    return int(np.argmax(mask)) if mask.any() else None
+
+
+class IntrabarFills:
+    """
+    Intrabar stop and target fills on the OHLC frame data, optionally resolved on the finer sub_data.
+    Frames without Open/High/Low columns (tick closes) use Close for them. bar_interval is the length of the
+    last bar, inferred from the index spacing when not given.
+    """
+
+    def __init__(self, data, sub_data=None, bar_interval=None):
+        self.index = data.index
+        self.open = _column(data, 'Open')
+        self.high = _column(data, 'High')
+        self.low = _column(data, 'Low')
+        self.sub_data = sub_data
+        if sub_data is None:
+            return
+
+        times = data.index.as_unit('ns').asi8
+        if bar_interval is not None:
+            bar_interval = pd.Timedelta(bar_interval).value
+        else:
+            bar_interval = int(np.median(np.diff(times))) if len(times) > 1 else 0
+        sub_times = sub_data.index.as_unit('ns').asi8
+        # Sub-bars of bar i are sub_starts[i]..sub_starts[i + 1] - 1
+        self.sub_starts = np.searchsorted(sub_times, np.append(times, times[-1] + bar_interval if len(times) else 0))
+        self.sub_open = _column(sub_data, 'Open')
+        self.sub_high = _column(sub_data, 'High')
+        self.sub_low = _column(sub_data, 'Low')
+
+    def fill(self, i, stop=None, target=None):
+        """
+        Exit of a long position held into bar i: None, or (action, price, time) with action STOP_LOSS or
+        TAKE_PROFIT. stop and target are the levels in force when the bar opens; either may be None.
+        """
+        stop_hit = stop is not None and self.low[i] <= stop
+        target_hit = target is not None and self.high[i] >= target
+        if not stop_hit and not target_hit:
+            return None
+
+        if self.sub_data is not None:
+            first, last = self.sub_starts[i], self.sub_starts[i + 1]
+            if first < last:
+                stop_at = _first_true(self.sub_low[first:last] <= stop) if stop_hit else None
+                target_at = _first_true(self.sub_high[first:last] >= target) if target_hit else None
+                if stop_at is not None and (target_at is None or stop_at <= target_at):
+                    stop_at += first
+                    return STOP_LOSS, min(stop, self.sub_open[stop_at]), self.sub_data.index[stop_at]
+                if target_at is not None:
+                    target_at += first
+                    return TAKE_PROFIT, max(target, self.sub_open[target_at]), self.sub_data.index[target_at]
+                # The sub-bars never reach the bar's own extremes: judge the bar alone
+
+        if stop_hit:
+            return STOP_LOSS, min(stop, self.open[i]), self.index[i]
+        return TAKE_PROFIT, max(target, self.open[i]), self.index[i]
@@ -0,0 +1,377 @@
+import math
+from collections import deque
+
+
+# Streaming indicators for the live traders: each update takes one new candle and runs in
+# constant time, no matter how much history came before it. The EMAs repeat pandas'
+# ewm(adjust=False) recursion and the peak flags repeat indicators.py, so those match the batch
+# versions bit for bit (the blocked EMA in indicators.py agrees with pandas to rounding error).
+# RSI, ATR and the rolling VWAP keep running window sums (see RollingMean) and agree to rounding error.
+
+def _fmax(a, b):
+    # NaN-ignoring maximum, like np.fmax
+    if a != a:
+        return b
+    if b != b:
+        return a
+    return a if a >= b else b
+
+
+class RollingMean:
+    """
+    Trailing mean over a ring buffer, NaN until the window is full or while it holds a NaN.
+    A running total makes each update O(1). It is re-summed from the buffer, oldest to newest like
+    indicators.rolling_mean, once every window updates and whenever a NaN leaves the window, so rounding
+    never builds up over more than one window.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [0.0] * window
+        self.count = 0
+        self.position = 0
+        self.total = 0.0
+        self.nans = 0
+
+    def update(self, value):
+        evicted = self.buffer[self.position]
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.window
+        self.count += 1
+        if value != value:
+            self.nans += 1
+        if evicted != evicted:
+            self.nans -= 1
+
+        if self.position == 0 or evicted != evicted:
+            total = 0.0
+            for offset in range(self.window):
+                item = self.buffer[(self.position + offset) % self.window]
+                if item == item:
+                    total += item
+            self.total = total
+        else:
+            self.total += (value if value == value else 0.0) - (evicted if evicted == evicted else 0.0)
+        if self.count < self.window or self.nans:
+            return math.nan
+        return self.total / self.window
+
+
+class IncrementalEMA:
+    """Exponential moving average, identical to Series.ewm(span=span, adjust=False).mean()."""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = math.nan
+
+    def update(self, value):
+        if self.value != self.value:
+            # Leading NaNs stay NaN, the first observation seeds the average
+            self.value = value
+        elif value == value and self.value != value:
+            # Same arithmetic as pandas' adjust=False recursion
+            old_weight = 1.0 - self.alpha
+            self.value = (old_weight * self.value + self.alpha * value) / (old_weight + self.alpha)
+        return self.value
+
+
+class IncrementalMACD:
+    """MACD line, signal line and histogram updated one close at a time."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast_ema = IncrementalEMA(fast)
+        self.slow_ema = IncrementalEMA(slow)
+        self.signal_ema = IncrementalEMA(signal)
+
+    def update(self, close):
+        macd = self.fast_ema.update(close) - self.slow_ema.update(close)
+        signal = self.signal_ema.update(macd)
+        return macd, signal, macd - signal
+
+
+class IncrementalRSI:
+    """RSI from rolling means of gains and losses, as indicators.rsi."""
+
+    def __init__(self, window=14):
+        self.average_gain = RollingMean(window)
+        self.average_loss = RollingMean(window)
+        self.previous_close = None
+
+    def update(self, close):
+        # The first price change is undefined
+        delta = math.nan if self.previous_close is None else close - self.previous_close
+        self.previous_close = close
+        gain = self.average_gain.update(delta if delta != delta else max(delta, 0.0))
+        loss = self.average_loss.update(delta if delta != delta else max(-delta, 0.0))
+
+        if gain != gain or loss != loss:
+            return math.nan
+        if loss == 0.0:
+            rs = math.inf if gain > 0.0 else math.nan
+        else:
+            rs = gain / loss
+        return 100.0 - 100.0 / (rs + 1.0)
+
+
+class IncrementalATR:
+    """Average true range over a ring buffer of true ranges, as indicators.atr."""
+
+    def __init__(self, window=14):
+        self.average_range = RollingMean(window)
+        self.previous_close = None
+
+    def update(self, high, low, close):
+        true_range = high - low
+        if self.previous_close is not None:
+            true_range = _fmax(true_range, abs(high - self.previous_close))
+            true_range = _fmax(true_range, abs(low - self.previous_close))
+        self.previous_close = close
+        return self.average_range.update(true_range)
+
+
+class RollingMoments:
+    """
+    Trailing window mean and sum of squared deviations with Welford add/remove updates, O(1) per value.
+    NaN while the window is not full or holds a NaN. The moments are rebuilt from the buffer once per window
+    length (amortised O(1)), so rounding from the removals cannot pile up over a long live session.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [math.nan] * window
+        self.position = 0
+        self.count = 0
+        self.nan_count = window
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _add(self, value, size):
+        delta = value - self.mean
+        self.mean += delta / size
+        self.m2 += delta * (value - self.mean)
+
+    def _rebuild(self):
+        self.mean = self.m2 = 0.0
+        size = 0
+        for value in self.buffer:
+            if value == value:
+                size += 1
+                self._add(value, size)
+
+    def update(self, value):
+        old = self.buffer[self.position]
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.window
+        self.count += 1
+        self.nan_count += (value != value) - (old != old)
+        valid = self.window - self.nan_count
+
+        if self.position == 0:
+            self._rebuild()
+        else:
+            if old == old:
+                # Remove the oldest value, leaving the valid values other than the new one
+                remaining = valid - (value == value)
+                if remaining == 0:
+                    self.mean = self.m2 = 0.0
+                else:
+                    delta = old - self.mean
+                    self.mean -= delta / remaining
+                    self.m2 -= delta * (old - self.mean)
+            if value == value:
+                self._add(value, valid)
+
+        if self.count < self.window or self.nan_count:
+            return math.nan, math.nan
+        return self.mean, max(self.m2, 0.0)
+
+
+class RollingStd:
+    """Trailing standard deviation, as indicators.rolling_std."""
+
+    def __init__(self, window, ddof=1):
+        self.moments = RollingMoments(window)
+        self.ddof = ddof
+
+    def update(self, value):
+        _, m2 = self.moments.update(value)
+        if m2 != m2 or self.moments.window <= self.ddof:
+            return math.nan
+        return math.sqrt(m2 / (self.moments.window - self.ddof))
+
+
+class RollingZScore:
+    """Distance of each value from its trailing window mean in rolling standard deviations."""
+
+    def __init__(self, window, ddof=1):
+        self.moments = RollingMoments(window)
+        self.ddof = ddof
+
+    def update(self, value):
+        mean, m2 = self.moments.update(value)
+        if m2 != m2 or self.moments.window <= self.ddof:
+            return math.nan
+        std = math.sqrt(m2 / (self.moments.window - self.ddof))
+        if std == 0.0:
+            return math.nan if value == mean else math.copysign(math.inf, value - mean)
+        return (value - mean) / std
+
+
+class ReturnVolatility:
+    """Rolling standard deviation of log returns, as indicators.return_volatility."""
+
+    def __init__(self, window=20):
+        self.std = RollingStd(window)
+        self.previous_close = None
+
+    def update(self, close):
+        log_return = math.nan
+        if self.previous_close is not None and self.previous_close > 0 and close > 0:
+            log_return = math.log(close / self.previous_close)
+        self.previous_close = close
+        return self.std.update(log_return)
+
+
+class SessionVWAP:
+    """Volume weighted average price since the start of the current session, as indicators.session_vwap."""
+
+    def __init__(self):
+        self.session = None
+        self.traded = 0.0
+        self.volume = 0.0
+
+    def update(self, session, price, volume):
+        if session != self.session:
+            self.session = session
+            self.traded = self.volume = 0.0
+        if price * volume == price * volume:
+            self.traded += price * volume
+            self.volume += volume
+        return self.traded / self.volume if self.volume else math.nan
+
+
+class RollingVWAP:
+    """Volume weighted average price over the trailing window candles, as indicators.rolling_vwap."""
+
+    def __init__(self, window):
+        self.traded = RollingMean(window)
+        self.volume = RollingMean(window)
+
+    def update(self, price, volume):
+        traded = self.traded.update(price * volume)
+        average_volume = self.volume.update(volume)
+        if average_volume == 0.0:
+            return math.nan
+        return traded / average_volume
+
+
+class VolumeProfile:
+    """Running volume-by-price histogram over fixed price bins, as indicators.volume_profile."""
+
+    def __init__(self, low, high, bins=50):
+        self.low = low
+        self.scale = bins / (high - low)
+        self.bin_edges = [low + (high - low) * k / bins for k in range(bins + 1)]
+        self.volume_per_bin = [0.0] * bins
+
+    def update(self, price, volume):
+        if price == price and volume == volume:
+            index = min(max(int((price - self.low) * self.scale), 0), len(self.volume_per_bin) - 1)
+            self.volume_per_bin[index] += volume
+        return self.volume_per_bin
+
+    def point_of_control(self):
+        top = max(range(len(self.volume_per_bin)), key=self.volume_per_bin.__getitem__)
+        return (self.bin_edges[top] + self.bin_edges[top + 1]) / 2.0
+
+
+class RollingExtreme:
+    """Trailing window minimum or maximum with a monotonic deque: amortised O(1) per value, NaNs skipped."""
+
+    def __init__(self, window, is_max=False):
+        self.window = window
+        self.is_max = is_max
+        self.candidates = deque()
+        self.count = 0
+
+    def update(self, value):
+        position = self.count
+        self.count += 1
+        if value == value:
+            # Older values that can no longer be the extreme drop off the back
+            while self.candidates and (self.candidates[-1][1] <= value if self.is_max else self.candidates[-1][1] >= value):
+                self.candidates.pop()
+            self.candidates.append((position, value))
+        while self.candidates and self.candidates[0][0] <= position - self.window:
+            self.candidates.popleft()
+        return self.candidates[0][1] if self.candidates else math.nan
+
+
+class IncrementalSupportResistance:
+    """Support (lowest Low) and resistance (highest High) over the last lookback_period candles."""
+
+    def __init__(self, lookback_period=20):
+        self.support = RollingExtreme(lookback_period)
+        self.resistance = RollingExtreme(lookback_period, is_max=True)
+
+    def update(self, high, low):
+        return self.support.update(low), self.resistance.update(high)
+
+
+class IncrementalMACDPeaks:
+    """
+    Derivative turning-point check on the MACD histogram.
+    A new histogram value decides whether the previous bar was a Green_Peak or Red_Peak,
+    the same flags identify_macd_peaks_and_troughs_using_derivative sets on that bar.
+    """
+
+    def __init__(self):
+        self.previous_histogram = math.nan
+        self.previous_delta = math.nan
+
+    def update(self, histogram):
+        delta = histogram - self.previous_histogram
+        green_peak = self.previous_delta > 0 and delta <= 0
+        red_peak = self.previous_delta < 0 and delta >= 0
+        self.previous_histogram = histogram
+        self.previous_delta = delta
+        return green_peak, red_peak
+
+
+class IncrementalIndicatorEngine:
+    """
+    MACD, RSI, ATR and MACD histogram peaks for the live trader, one candle at a time.
+    Green_Peak/Red_Peak in the returned row belong to the previous candle: a turn is only known one bar later.
+    """
+
+    def __init__(self, rsi_window=7, atr_window=7, fast=12, slow=26, signal=9):
+        self.macd = IncrementalMACD(fast, slow, signal)
+        self.rsi = IncrementalRSI(rsi_window)
+        self.atr = IncrementalATR(atr_window)
+        self.peaks = IncrementalMACDPeaks()
+        self.last_timestamp = None
+        self.latest = None
+
+    def update(self, timestamp, high, low, close):
+        macd, signal, histogram = self.macd.update(close)
+        previous_green_peak, previous_red_peak = self.peaks.update(histogram)
+        self.last_timestamp = timestamp
+        self.latest = {
+            'MACD': macd,
+            'Signal_Line': signal,
+            'MACD_Histogram': histogram,
+            'RSI': self.rsi.update(close),
+            'ATR': self.atr.update(high, low, close),
+            'Previous_Green_Peak': previous_green_peak,
+            'Previous_Red_Peak': previous_red_peak,
+        }
+        return self.latest
+
+    def update_from_frame(self, data):
+        """Feed the rows of an OHLC frame that are newer than the last candle seen; return the latest values."""
+        if self.last_timestamp is not None:
+            data = data.iloc[data.index.searchsorted(self.last_timestamp, side='right'):]
+        for timestamp, high, low, close in zip(data.index, data['High'].to_numpy(), data['Low'].to_numpy(),
+                                               data['Close'].to_numpy()):
+            self.update(timestamp, float(high), float(low), float(close))
+        return self.latest
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from indicators import atr, ema, macd, rsi
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), 'indicator_cache')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+# Indicator definitions: compute(inputs, **params) returns a list of output arrays, and
+# extend(inputs, cached, **params) returns the same list given the outputs cached for a prefix of the inputs.
+
+def _compute_rsi(inputs, window=14, seed_first_delta=False):
+    close, = inputs
+    return [rsi(close, window, seed_first_delta)]
+
+
+def _compute_atr(inputs, window=14):
+    high, low, close = inputs
+    return [atr(high, low, close, window)]
+
+
+def _extend_windowed(compute):
+    def extend(inputs, cached, **params):
+        # A value depends on the last window + 1 prices only, and the kernels sum windows in the same
+        # order wherever the slice starts, so recomputing from window bars before the new rows is exact
+        n_cached = cached.shape[1]
+        start = max(n_cached - params['window'], 0)
+        tail = compute([values[start:] for values in inputs], **params)
+        return [np.concatenate((old, new[n_cached - start:])) for old, new in zip(cached, tail)]
+    return extend
+
+
+def _compute_macd(inputs, fast=12, slow=26, signal=9):
+    close, = inputs
+    macd_line, signal_line, histogram = macd(close, fast, slow, signal)
+    # The fast and slow EMAs are kept so that appended bars can continue them
+    return [macd_line, signal_line, histogram, ema(close, fast), ema(close, slow)]
+
+
+def _extend_macd(inputs, cached, fast=12, slow=26, signal=9):
+    close, = inputs
+    n_cached = cached.shape[1]
+    if np.isnan(cached[:, -1]).any() or np.isnan(close[n_cached - 1]):
+        # No settled average to continue from yet
+        return _compute_macd(inputs, fast, slow, signal)
+
+    tail = close[n_cached:]
+    fast_ema = ema(tail, fast, initial=cached[3, -1])
+    slow_ema = ema(tail, slow, initial=cached[4, -1])
+    macd_line = fast_ema - slow_ema
+    signal_line = ema(macd_line, signal, initial=cached[1, -1])
+    new = [macd_line, signal_line, macd_line - signal_line, fast_ema, slow_ema]
+    return [np.concatenate((old, values)) for old, values in zip(cached, new)]
+
+
+INDICATORS = {
+    'rsi': (_compute_rsi, _extend_windowed(_compute_rsi)),
+    'atr': (_compute_atr, _extend_windowed(_compute_atr)),
+    'macd': (_compute_macd, _extend_macd),
+}
+
+
+def fingerprint(inputs, length=None):
+    """Digest of the first length values of each input array (all of them by default)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for values in inputs:
+        values = np.ascontiguousarray(values[:length], dtype=np.float64)
+        digest.update(str(len(values)).encode())
+        digest.update(memoryview(values))
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """
+    On-disk cache of indicator outputs, keyed by the indicator, its parameters and a fingerprint of the input prices.
+    Each entry is one .npy file, listed with its size in index.json. Reading an entry touches its file, and the
+    least recently used entries (oldest modification time) are deleted once they hold more than max_bytes.
+
+    When the inputs start with the prices of a cached entry (the same history with new bars appended),
+    only the new rows are computed and the entry is replaced by the longer one.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, 'index.json')
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npy')
+
+    def _save_index(self):
+        temporary_path = self.index_path + '.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(temporary_path, self.index_path)
+
+    def _load(self, key):
+        try:
+            outputs = np.load(self._path(key))
+        except (OSError, ValueError):
+            # Deleted or half-written file: forget the entry
+            self._remove(key)
+            return None
+        # The file time is the LRU clock, so a hit needs no index write
+        os.utime(self._path(key))
+        return outputs
+
+    def _store(self, key, indicator, parameters, input_digest, outputs):
+        outputs = np.asarray(outputs, dtype=np.float64)
+        temporary_path = self._path(key) + '.tmp'
+        with open(temporary_path, 'wb') as f:
+            np.save(f, outputs)
+        os.replace(temporary_path, self._path(key))
+        self.entries[key] = {
+            'indicator': indicator,
+            'parameters': parameters,
+            'length': outputs.shape[1],
+            'input_digest': input_digest,
+            'bytes': os.path.getsize(self._path(key)),
+        }
+        self._evict()
+        self._save_index()
+
+    def _remove(self, key):
+        del self.entries[key]
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _last_used(self, key):
+        try:
+            return os.path.getmtime(self._path(key))
+        except OSError:
+            return 0.0
+
+    def _evict(self):
+        total = sum(entry['bytes'] for entry in self.entries.values())
+        for key in sorted(self.entries, key=self._last_used):
+            if total <= self.max_bytes:
+                break
+            total -= self.entries[key]['bytes']
+            self._remove(key)
+
+    def _longest_cached_prefix(self, indicator, parameters, inputs):
+        n = len(inputs[0])
+        candidates = [key for key, entry in self.entries.items()
+                      if entry['indicator'] == indicator and entry['parameters'] == parameters
+                      and 0 < entry['length'] < n]
+        for key in sorted(candidates, key=lambda key: -self.entries[key]['length']):
+            entry = self.entries[key]
+            if fingerprint(inputs, entry['length']) == entry['input_digest']:
+                return key
+        return None
+
+    def compute(self, indicator, inputs, **params):
+        """Outputs of INDICATORS[indicator] for the input arrays, from the cache when possible."""
+        if indicator not in INDICATORS:
+            raise ValueError("Unknown indicator: " + str(indicator))
+        compute, extend = INDICATORS[indicator]
+        inputs = [np.asarray(values, dtype=np.float64) for values in inputs]
+        parameters = json.dumps(params, sort_keys=True)
+        input_digest = fingerprint(inputs)
+        key = hashlib.blake2b((indicator + parameters + input_digest).encode(), digest_size=16).hexdigest()
+
+        outputs = self._load(key) if key in self.entries else None
+        if outputs is None:
+            prefix_key = self._longest_cached_prefix(indicator, parameters, inputs)
+            cached = self._load(prefix_key) if prefix_key is not None else None
+            if cached is not None:
+                outputs = extend(inputs, cached, **params)
+                # A growing series only asks for its newest length again
+                self._remove(prefix_key)
+            else:
+                outputs = compute(inputs, **params)
+            self._store(key, indicator, parameters, input_digest, outputs)
+        return list(outputs)
+
+    # Drop-in versions of the indicators.py wrappers used by the trading scripts
+
+    def compute_rsi(self, data, window=14):
+        rsi_values, = self.compute('rsi', [data.to_numpy(dtype=np.float64)], window=window)
+        return pd.Series(rsi_values, index=data.index, name=data.name)
+
+    def calculate_rsi(self, data, window=14):
+        rsi_values, = self.compute('rsi', [data['Close'].to_numpy(dtype=np.float64)], window=window,
+                                   seed_first_delta=True)
+        return pd.Series(rsi_values, index=data.index)
+
+    def calculate_atr(self, data, window=14):
+        inputs = [data[column].to_numpy(dtype=np.float64) for column in ('High', 'Low', 'Close')]
+        atr_values, = self.compute('atr', inputs, window=window)
+        return pd.Series(atr_values, index=data.index)
+
+    def calculate_macd(self, data, n_slow=26, n_fast=12, n_signal=9):
+        outputs = self.compute('macd', [data['Close'].to_numpy(dtype=np.float64)], fast=n_fast, slow=n_slow,
+                               signal=n_signal)
+        return pd.Series(outputs[0], index=data.index), pd.Series(outputs[1], index=data.index)
+
+    def add_macd_columns(self, df, signal_column='Signal', fast=12, slow=26, signal=9):
+        outputs = self.compute('macd', [df['Close'].to_numpy(dtype=np.float64)], fast=fast, slow=slow,
+                               signal=signal)
+        df['MACD'] = outputs[0]
+        df[signal_column] = outputs[1]
+        df['MACD_Histogram'] = outputs[2]
+        return df
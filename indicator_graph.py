@@ -0,0 +1,176 @@
+import re
+import numpy as np
+import pandas as pd
+
+from indicators import (macd, macd_histogram_turning_points, return_volatility, rolling_mean, rolling_vwap,
+                        rolling_zscore, rsi, session_vwap, true_range, typical_price)
+
+
+# Series a strategy can ask for by name, e.g. 'Close', 'RSI(7)', 'ATR(7)', 'MACD_Histogram', 'Red_Peak(12, 26, 9)'.
+# Each node is a function of the graph and its arguments that pulls its inputs from the graph, so shared work
+# (the MACD lines behind both peak flags, the true range behind every ATR) is computed once per dataset.
+NODES = {}
+
+_SERIES_NAME = re.compile(r'^\s*(\w+)\s*(?:\((.*)\))?\s*$')
+
+
+def node(name, *defaults):
+    """Register a graph node; defaults fill in arguments left out of the requested name."""
+    def register(func):
+        NODES[name] = (func, defaults)
+        return func
+    return register
+
+
+def parse_series_name(name):
+    """'RSI(7)' -> ('RSI', (7,)), 'Close' -> ('Close', ())."""
+    match = _SERIES_NAME.match(name)
+    if match is None:
+        raise ValueError("Invalid series name: " + str(name))
+    node_name, arguments = match.groups()
+    if not arguments or not arguments.strip():
+        return node_name, ()
+    return node_name, tuple(float(a) if '.' in a else int(a) for a in arguments.split(','))
+
+
+class IndicatorGraph:
+    """
+    Lazily computed indicator series for one OHLC frame. graph['RSI(7)'] computes the RSI on first use
+    and returns the same Series afterwards; nodes it depends on are shared the same way.
+    Every public node, the price columns included, is a Series on the frame's index (float64, or bool for the
+    peak flags); callers that want arrays take .to_numpy(). Nodes named with a leading underscore hold
+    intermediate arrays.
+    With an IndicatorCache, the MACD, RSI and ATR nodes are read through it.
+    """
+
+    def __init__(self, data, cache=None):
+        self.data = data
+        self.cache = cache
+        self.values = {}
+
+    def key(self, name):
+        node_name, arguments = parse_series_name(name)
+        if node_name not in NODES:
+            raise KeyError("Unknown series: " + str(name))
+        defaults = NODES[node_name][1]
+        if len(arguments) > len(defaults):
+            raise ValueError("Too many arguments for " + node_name + ": " + str(name))
+        return node_name, arguments + defaults[len(arguments):]
+
+    def __getitem__(self, name):
+        key = self.key(name)
+        if key not in self.values:
+            func = NODES[key[0]][0]
+            self.values[key] = func(self, *key[1])
+        return self.values[key]
+
+    def series(self, values):
+        return pd.Series(values, index=self.data.index)
+
+    def assign(self, columns):
+        """Write series into the frame, e.g. assign({'RSI': 'RSI(7)'}) sets data['RSI']."""
+        for column, name in columns.items():
+            self.data[column] = self[name]
+        return self.data
+
+
+def _price_node(column):
+    def price(graph):
+        return graph.series(graph.data[column].to_numpy(dtype=np.float64))
+    return price
+
+
+def _array(graph, name):
+    # The node's values for the kernels in indicators.py
+    return graph[name].to_numpy()
+
+
+for _column in ('Open', 'High', 'Low', 'Close', 'Volume'):
+    node(_column)(_price_node(_column))
+
+
+@node('_MACD_Lines', 12, 26, 9)
+def _macd_lines(graph, fast, slow, signal):
+    close = _array(graph, 'Close')
+    if graph.cache is not None:
+        return graph.cache.compute('macd', [close], fast=fast, slow=slow, signal=signal)[:3]
+    return macd(close, fast, slow, signal)
+
+
+@node('MACD', 12, 26, 9)
+def _macd_line(graph, fast, slow, signal):
+    return graph.series(graph['_MACD_Lines(%d, %d, %d)' % (fast, slow, signal)][0])
+
+
+@node('Signal_Line', 12, 26, 9)
+def _signal_line(graph, fast, slow, signal):
+    return graph.series(graph['_MACD_Lines(%d, %d, %d)' % (fast, slow, signal)][1])
+
+
+@node('MACD_Histogram', 12, 26, 9)
+def _macd_histogram(graph, fast, slow, signal):
+    return graph.series(graph['_MACD_Lines(%d, %d, %d)' % (fast, slow, signal)][2])
+
+
+@node('_Turning_Points', 12, 26, 9)
+def _turning_points(graph, fast, slow, signal):
+    histogram = graph['MACD_Histogram(%d, %d, %d)' % (fast, slow, signal)]
+    return macd_histogram_turning_points(histogram.to_numpy())
+
+
+@node('Green_Peak', 12, 26, 9)
+def _green_peak(graph, fast, slow, signal):
+    return graph.series(graph['_Turning_Points(%d, %d, %d)' % (fast, slow, signal)][0])
+
+
+@node('Red_Peak', 12, 26, 9)
+def _red_peak(graph, fast, slow, signal):
+    return graph.series(graph['_Turning_Points(%d, %d, %d)' % (fast, slow, signal)][1])
+
+
+@node('RSI', 14)
+def _rsi(graph, window):
+    close = _array(graph, 'Close')
+    if graph.cache is not None:
+        return graph.series(graph.cache.compute('rsi', [close], window=window)[0])
+    return graph.series(rsi(close, window))
+
+
+@node('True_Range')
+def _true_range(graph):
+    return graph.series(true_range(_array(graph, 'High'), _array(graph, 'Low'), _array(graph, 'Close')))
+
+
+@node('ATR', 14)
+def _atr(graph, window):
+    if graph.cache is not None:
+        inputs = [_array(graph, 'High'), _array(graph, 'Low'), _array(graph, 'Close')]
+        return graph.series(graph.cache.compute('atr', inputs, window=window)[0])
+    return graph.series(rolling_mean(_array(graph, 'True_Range'), window))
+
+
+@node('Return_Volatility', 20)
+def _return_volatility(graph, window):
+    return graph.series(return_volatility(_array(graph, 'Close'), window))
+
+
+@node('ZScore', 20)
+def _zscore(graph, window):
+    return graph.series(rolling_zscore(_array(graph, 'Close'), window))
+
+
+@node('Typical_Price')
+def _typical_price(graph):
+    return graph.series(typical_price(_array(graph, 'High'), _array(graph, 'Low'), _array(graph, 'Close')))
+
+
+@node('VWAP')
+def _vwap(graph):
+    # Daily sessions
+    sessions = graph.data.index.floor('D').asi8
+    return graph.series(session_vwap(_array(graph, 'Typical_Price'), _array(graph, 'Volume'), sessions))
+
+
+@node('Rolling_VWAP', 20)
+def _rolling_vwap(graph, window):
+    return graph.series(rolling_vwap(_array(graph, 'Typical_Price'), _array(graph, 'Volume'), window))
@@ -0,0 +1,651 @@
+import numpy as np
+import pandas as pd
+
+# Block length for the blocked EMA solver; small blocks keep the weight matrix cheap and exact
+EMA_BLOCK_SIZE = 16
+# Longest window summed directly, one add pass per window bar; longer windows use block prefix/suffix sums
+DIRECT_WINDOW_SUM_MAX = 32
+
+
+# Array kernels: float64 arrays in, float64 arrays out. Pass out= to reuse a preallocated buffer.
+
+def _as_float_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _output_buffer(out, n):
+    if out is None:
+        return np.empty(n, dtype=np.float64)
+    if len(out) != n:
+        raise ValueError("Output buffer has length " + str(len(out)) + ", expected " + str(n))
+    return out
+
+
+def _linear_recurrence(inputs, coefficient, initial, out):
+    """
+    Solve y[t] = coefficient * y[t-1] + inputs[t] with y[-1] = initial.
+    Each block is solved from a zero start with one matrix product, then the block-end values
+    (which follow the same recurrence with coefficient ** block) carry the state forward.
+    """
+    n = len(inputs)
+    block = EMA_BLOCK_SIZE
+    n_blocks = -(-n // block)
+    padded = np.zeros(n_blocks * block)
+    padded[:n] = inputs
+
+    lags = np.arange(block)[:, None] - np.arange(block)[None, :]
+    weights = np.where(lags >= 0, coefficient ** np.maximum(lags, 0), 0.0)
+    local = padded.reshape(n_blocks, block) @ weights.T
+
+    if n_blocks == 1:
+        previous_ends = np.array([initial])
+    else:
+        ends = np.empty(n_blocks)
+        _linear_recurrence(local[:, -1], coefficient ** block, initial, ends)
+        previous_ends = np.concatenate(([initial], ends[:-1]))
+    local += previous_ends[:, None] * coefficient ** np.arange(1, block + 1)
+
+    out[:] = local.ravel()[:n]
+    return out
+
+
+def ema(values, span, out=None, initial=None):
+    """
+    Exponential moving average, identical to Series.ewm(span=span, adjust=False).mean().
+    initial continues an earlier average: the value it had on the bar before values[0].
+    """
+    values = _as_float_array(values)
+    out = _output_buffer(out, len(values))
+    if initial is not None:
+        if initial != initial or len(values) == 0 or np.isnan(values).any():
+            out[:] = ema(np.concatenate(([initial], values)), span)[1:]
+        else:
+            alpha = 2.0 / (span + 1.0)
+            _linear_recurrence(alpha * values, 1.0 - alpha, initial, out)
+        return out
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0:
+        out[:] = np.nan
+        return out
+
+    first = valid[0]
+    out[:first] = np.nan
+    if len(valid) != len(values) - first:
+        # Gaps inside the series need pandas' NaN weighting
+        out[first:] = pd.Series(values[first:]).ewm(span=span, adjust=False).mean().to_numpy()
+        return out
+
+    alpha = 2.0 / (span + 1.0)
+    _linear_recurrence(alpha * values[first:], 1.0 - alpha, values[first], out[first:])
+    return out
+
+
+def macd(close, fast=12, slow=26, signal=9, out=None):
+    """MACD line, signal line and histogram. out, if given, is a (macd, signal, histogram) tuple of buffers."""
+    close = _as_float_array(close)
+    n = len(close)
+    macd_line, signal_line, histogram = out if out is not None else (None, None, None)
+    macd_line = ema(close, fast, out=macd_line)
+    histogram = _output_buffer(histogram, n)
+    # Use the histogram buffer as scratch space for the slow EMA
+    np.subtract(macd_line, ema(close, slow, out=histogram), out=macd_line)
+    signal_line = ema(macd_line, signal, out=signal_line)
+    np.subtract(macd_line, signal_line, out=histogram)
+    return macd_line, signal_line, histogram
+
+
+def rolling_mean(values, window, out=None):
+    """Trailing mean over window bars, NaN until the window is full or if it holds a NaN (rolling(window).mean())."""
+    values = _as_float_array(values)
+    n = len(values)
+    out = _output_buffer(out, n)
+    out[:min(window - 1, n)] = np.nan
+    if n < window:
+        return out
+
+    total = out[window - 1:]
+    if window > DIRECT_WINDOW_SUM_MAX:
+        _block_window_sums(values, window, total)
+    else:
+        # Direct window sums: exact, and with small windows cheaper than a compensated running sum
+        total[:] = values[:n - window + 1]
+        for offset in range(1, window):
+            np.add(total, values[offset:n - window + 1 + offset], out=total)
+    total /= window
+    return out
+
+
+def _block_window_sums(values, window, out):
+    """
+    Sums of every window bars of values into out (length n - window + 1), in O(n) for any window.
+    With values cut into blocks of window bars, a window that does not start a block is the tail of one block
+    plus the head of the next, so each sum adds a suffix sum and a prefix sum of at most window bars: no
+    running total over the whole series to lose precision, and a NaN only reaches the windows holding it.
+    """
+    n = len(values)
+    n_blocks = -(-n // window)
+    padded = np.zeros(n_blocks * window)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+    prefix = np.cumsum(blocks, axis=1).ravel()
+    suffix = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    starts = np.arange(n - window + 1)
+    np.add(suffix[starts], prefix[starts + window - 1], out=out)
+    # A window starting a block is that block alone
+    aligned = starts[::window]
+    out[aligned] = suffix[aligned]
+    return out
+
+
+def rsi(close, window=14, seed_first_delta=False, out=None):
+    """
+    Relative strength index from rolling means of gains and losses.
+    The first price change is undefined, so the first full window starts at bar 1.
+    seed_first_delta=True counts it as zero instead (as calculate_rsi in main.py did), giving one more value.
+    """
+    close = _as_float_array(close)
+    n = len(close)
+    out = _output_buffer(out, n)
+    delta = np.empty(n)
+    delta[:1] = 0.0 if seed_first_delta else np.nan
+    np.subtract(close[1:], close[:-1], out=delta[1:])
+
+    gains = np.maximum(delta, 0.0)
+    losses = np.maximum(np.negative(delta, out=delta), 0.0, out=delta)
+    average_loss = rolling_mean(losses, window, out=out)
+    # The delta buffer is free again once the losses are averaged
+    average_gain = rolling_mean(gains, window, out=delta)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(average_gain, average_loss, out=out)
+        # 100 - 100 / (1 + rs)
+        out += 1.0
+        np.divide(100.0, out, out=out)
+        np.subtract(100.0, out, out=out)
+    return out
+
+
+def true_range(high, low, close, out=None):
+    """Largest of high - low, |high - previous close| and |low - previous close|."""
+    high, low, close = _as_float_array(high), _as_float_array(low), _as_float_array(close)
+    n = len(close)
+    out = _output_buffer(out, n)
+    np.subtract(high, low, out=out)
+    if n < 2:
+        return out
+
+    scratch = np.empty(n - 1)
+    np.fmax(out[1:], np.abs(np.subtract(high[1:], close[:-1], out=scratch), out=scratch), out=out[1:])
+    np.fmax(out[1:], np.abs(np.subtract(low[1:], close[:-1], out=scratch), out=scratch), out=out[1:])
+    return out
+
+
+def atr(high, low, close, window=14, out=None):
+    """Average true range: rolling mean of the true range."""
+    ranges = true_range(high, low, close)
+    return rolling_mean(ranges, window, out=out)
+
+
+def _rolling_extreme(values, window, func, out):
+    """
+    Trailing window minimum or maximum (func = np.fmin / np.fmax) in O(n) with the van Herk/Gil-Werman scheme:
+    running extremes from both ends of fixed blocks; any window spans at most two blocks.
+    Windows shorter than window at the start use the bars available, and NaNs are skipped, like pandas min/max.
+    """
+    values = _as_float_array(values)
+    n = len(values)
+    out = _output_buffer(out, n)
+    if n == 0:
+        return out
+
+    n_blocks = -(-n // window)
+    padded = np.full(n_blocks * window, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+    prefix = func.accumulate(blocks, axis=1).ravel()
+    suffix = func.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    # The first window - 1 bars are prefixes of the first block
+    head = min(window - 1, n)
+    out[:head] = prefix[:head]
+    # Window [i - window + 1, i]: from its start to the end of that block, then from the next block start to i
+    func(suffix[:n - head], prefix[head:n], out=out[head:])
+    return out
+
+
+def rolling_min(values, window, out=None):
+    return _rolling_extreme(values, window, np.fmin, out)
+
+
+def rolling_max(values, window, out=None):
+    return _rolling_extreme(values, window, np.fmax, out)
+
+
+def _rolling_moments(values, window):
+    """
+    Trailing window mean and sum of squared deviations (M2), NaN until the window is full or if it holds a NaN.
+    Fixed blocks of window bars are summed from both ends around a per-block shift, so the sums only see
+    deviations from a nearby price; each window is one block suffix plus the next block's prefix, and the
+    two halves are merged with the Welford/Chan update M2 = M2_a + M2_b + delta ** 2 * n_a * n_b / n.
+    """
+    values = _as_float_array(values)
+    n = len(values)
+    mean = np.full(n, np.nan)
+    m2 = np.full(n, np.nan)
+    if n < window:
+        return mean, m2
+
+    n_blocks = -(-n // window)
+    blocks = np.zeros((n_blocks, window))
+    blocks.ravel()[:n] = values
+    shift = np.nan_to_num(np.fmax.reduce(blocks, axis=1))
+    blocks -= shift[:, None]
+    squares = blocks * blocks
+    prefix_sum = np.cumsum(blocks, axis=1).ravel()
+    prefix_squares = np.cumsum(squares, axis=1).ravel()
+    suffix_sum = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    suffix_squares = np.cumsum(squares[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    # Window [start, end]: block suffix from start, then the next block's prefix up to end (empty if aligned)
+    count = n - window + 1
+    offset = np.tile(np.arange(window, dtype=np.float64), n_blocks)[:count]
+    n_a = window - offset
+    n_b = offset
+    a_sum, b_sum = suffix_sum[:count], prefix_sum[window - 1:n]
+    m2_a = suffix_squares[:count] - a_sum * a_sum / n_a
+    mean_a = a_sum / n_a + np.repeat(shift, window)[:count]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m2_b = prefix_squares[window - 1:n] - b_sum * b_sum / n_b
+        mean_b = b_sum / n_b + np.repeat(shift, window)[window - 1:n]
+    aligned = n_b == 0
+    m2_b[aligned] = 0.0
+    mean_b[aligned] = mean_a[aligned]
+    delta = mean_b - mean_a
+    np.add(mean_a, delta * (n_b / window), out=mean[window - 1:])
+    np.maximum(m2_a + m2_b + delta * delta * (n_a * n_b / window), 0.0, out=m2[window - 1:])
+    return mean, m2
+
+
+def rolling_std(values, window, ddof=1):
+    """Trailing standard deviation, as rolling(window).std(ddof=ddof), in O(n) without losing precision."""
+    _, m2 = _rolling_moments(values, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(m2 / (window - ddof))
+
+
+def rolling_zscore(values, window, ddof=1):
+    """How many rolling standard deviations each value sits above its trailing window mean."""
+    values = _as_float_array(values)
+    mean, m2 = _rolling_moments(values, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (values - mean) / np.sqrt(m2 / (window - ddof))
+
+
+def log_returns(close):
+    """Bar-to-bar log returns; the first is NaN."""
+    close = _as_float_array(close)
+    returns = np.empty(len(close))
+    returns[:1] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.log(close[1:] / close[:-1], out=returns[1:])
+    return returns
+
+
+def return_volatility(close, window=20):
+    """Rolling standard deviation of log returns: a volatility filter that means the same at any price level."""
+    return rolling_std(log_returns(close), window)
+
+
+def typical_price(high, low, close):
+    """(high + low + close) / 3, the price a kline's volume is credited to."""
+    return (_as_float_array(high) + _as_float_array(low) + _as_float_array(close)) / 3.0
+
+
+def _session_cumsum(values, starts):
+    # Take each session's total off at the next session's first bar, so the running sum restarts near zero
+    # instead of carrying the whole history, then remove what rounding left over at each restart
+    adjusted = values.copy()
+    adjusted[starts[1:]] -= np.add.reduceat(values, starts)[:-1]
+    total = np.cumsum(adjusted, out=adjusted)
+    leftover = total[starts] - values[starts]
+    total -= np.repeat(leftover, np.diff(np.append(starts, len(values))))
+    return total
+
+
+def session_vwap(price, volume, sessions):
+    """
+    Volume weighted average price from the first bar of each session up to each bar.
+    sessions labels every bar (e.g. its day); a new session starts wherever the label changes.
+    Bars with a NaN price or volume add nothing.
+    """
+    price, volume = _as_float_array(price), _as_float_array(volume)
+    n = len(price)
+    if n == 0:
+        return np.empty(0)
+    sessions = np.asarray(sessions)
+    starts = np.flatnonzero(np.concatenate(([True], sessions[1:] != sessions[:-1])))
+
+    traded = price * volume
+    missing = np.isnan(traded)
+    traded[missing] = 0.0
+    volume = np.where(missing, 0.0, volume)
+    traded = _session_cumsum(traded, starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.divide(traded, _session_cumsum(volume, starts), out=traded)
+
+
+def rolling_vwap(price, volume, window):
+    """Volume weighted average price over the trailing window bars; O(n) for any window (see rolling_mean)."""
+    price, volume = _as_float_array(price), _as_float_array(volume)
+    traded = rolling_mean(price * volume, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.divide(traded, rolling_mean(volume, window), out=traded)
+
+
+def volume_profile(price, volume, bins=50, price_range=None):
+    """
+    Volume traded at each price level: volume summed into equal-width price bins in one pass.
+    Returns (bin_edges, volume_per_bin). price_range=(low, high) fixes the bins; prices outside it
+    are credited to the first or last bin. NaN prices are skipped.
+    """
+    price, volume = _as_float_array(price), _as_float_array(volume)
+    valid = ~(np.isnan(price) | np.isnan(volume))
+    price, volume = price[valid], volume[valid]
+    if price_range is None:
+        price_range = (price.min(), price.max()) if len(price) else (0.0, 1.0)
+    low, high = price_range
+    if high <= low:
+        high = low + 1.0
+    edges = np.linspace(low, high, bins + 1)
+    index = np.clip(((price - low) * (bins / (high - low))).astype(np.int64), 0, bins - 1)
+    return edges, np.bincount(index, weights=volume, minlength=bins).astype(np.float64)
+
+
+def point_of_control(bin_edges, volume_per_bin):
+    """Middle of the price bin with the most volume."""
+    top = int(np.argmax(volume_per_bin))
+    return (bin_edges[top] + bin_edges[top + 1]) / 2.0
+
+
+# Parameter grids: one row per window or span setting, sharing the work common to all rows
+
+def rolling_mean_matrix(values, windows):
+    """
+    Trailing means for several windows at once, shape (len(windows), len(values)).
+    Window sums are grown one bar at a time up to the largest window, so each extra window costs one add pass.
+    """
+    values = _as_float_array(values)
+    n = len(values)
+    windows = [int(window) for window in windows]
+    out = np.full((len(windows), n), np.nan)
+    rows_by_window = {}
+    for row, window in enumerate(windows):
+        rows_by_window.setdefault(window, []).append(row)
+
+    # window_sum[i] holds values[i - window + 1] + ... + values[i] for i >= window - 1
+    window_sum = values.copy()
+    for window in range(1, min(max(windows, default=0), n) + 1):
+        if window > 1:
+            window_sum[window - 1:] += values[:n - window + 1]
+        for row in rows_by_window.get(window, ()):
+            np.divide(window_sum[window - 1:], window, out=out[row, window - 1:])
+    return out
+
+
+def rsi_matrix(close, windows, seed_first_delta=False):
+    """RSI for several windows at once, shape (len(windows), len(close)); row k equals rsi(close, windows[k])."""
+    close = _as_float_array(close)
+    delta = np.empty(len(close))
+    delta[:1] = 0.0 if seed_first_delta else np.nan
+    np.subtract(close[1:], close[:-1], out=delta[1:])
+
+    average_gain = rolling_mean_matrix(np.maximum(delta, 0.0), windows)
+    out = rolling_mean_matrix(np.maximum(-delta, 0.0), windows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(average_gain, out, out=out)
+        out += 1.0
+        np.divide(100.0, out, out=out)
+        np.subtract(100.0, out, out=out)
+    return out
+
+
+def atr_matrix(high, low, close, windows):
+    """ATR for several windows at once from one true range series, shape (len(windows), len(close))."""
+    return rolling_mean_matrix(true_range(high, low, close), windows)
+
+
+def macd_histogram_matrix(close, settings):
+    """
+    MACD histogram for several (fast, slow, signal) settings, shape (len(settings), len(close)).
+    Each distinct EMA span of the close, and each distinct MACD line, is computed only once.
+    """
+    close = _as_float_array(close)
+    close_emas = {}
+    macd_lines = {}
+    out = np.empty((len(settings), len(close)))
+    signal_line = np.empty(len(close))
+    for row, (fast, slow, signal) in enumerate(settings):
+        for span in (fast, slow):
+            if span not in close_emas:
+                close_emas[span] = ema(close, span)
+        if (fast, slow) not in macd_lines:
+            macd_lines[fast, slow] = close_emas[fast] - close_emas[slow]
+        macd_line = macd_lines[fast, slow]
+        ema(macd_line, signal, out=signal_line)
+        np.subtract(macd_line, signal_line, out=out[row])
+    return out
+
+
+# Fused MACD, RSI and ATR: the strategies always want all three
+
+FUSED_BLOCK_SIZE = 1 << 16
+
+
+def macd_rsi_atr(high, low, close, fast=12, slow=26, signal=9, rsi_window=14, atr_window=14,
+                 block_size=FUSED_BLOCK_SIZE, out=None):
+    """
+    MACD line, signal line, histogram, RSI and ATR in one sweep over the OHLC arrays.
+    The arrays are walked in blocks small enough to stay in cache and every output is filled for a block
+    before moving on, so the inputs stream through memory once rather than once per indicator.
+    EMAs carry their last value into the next block and the rolling windows re-read the bars they overlap,
+    so RSI and ATR equal rsi()/atr() exactly and the MACD lines equal macd() to rounding error.
+    out, if given, is a tuple of five buffers.
+    """
+    high, low, close = _as_float_array(high), _as_float_array(low), _as_float_array(close)
+    n = len(close)
+    macd_line, signal_line, histogram, rsi_out, atr_out = [
+        _output_buffer(buffer, n) for buffer in (out if out is not None else (None,) * 5)]
+    lookback = max(rsi_window, atr_window)
+    fast_ema, slow_ema = np.empty(block_size), np.empty(block_size)
+    scratch = np.empty(block_size + lookback)
+    fast_state = slow_state = signal_state = None
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        size = end - start
+        block_close = close[start:end]
+
+        ema(block_close, fast, out=fast_ema[:size], initial=fast_state)
+        ema(block_close, slow, out=slow_ema[:size], initial=slow_state)
+        fast_state, slow_state = fast_ema[size - 1], slow_ema[size - 1]
+        np.subtract(fast_ema[:size], slow_ema[:size], out=macd_line[start:end])
+        ema(macd_line[start:end], signal, out=signal_line[start:end], initial=signal_state)
+        signal_state = signal_line[end - 1]
+        np.subtract(macd_line[start:end], signal_line[start:end], out=histogram[start:end])
+
+        # RSI and ATR need the window before the block as well
+        first = max(start - lookback, 0)
+        window_size = end - first
+        rsi(close[first:end], rsi_window, out=scratch[:window_size])
+        rsi_out[start:end] = scratch[start - first:window_size]
+        atr(high[first:end], low[first:end], close[first:end], atr_window, out=scratch[:window_size])
+        atr_out[start:end] = scratch[start - first:window_size]
+
+    return macd_line, signal_line, histogram, rsi_out, atr_out
+
+
+# Turning points and extrema of the MACD histogram
+
+def macd_histogram_turning_points(histogram, confirmed=False):
+    """
+    Find MACD histogram turning points from sign changes of its first derivative.
+    Green peaks: the histogram was rising and stops rising.
+    Red peaks: the histogram was falling and stops falling.
+
+    By default the flag sits on the turning bar itself (bar i-1 when the change is seen on bar i).
+    With confirmed=True the flag sits on bar i, the first bar at which the turn is known.
+    """
+    histogram = np.asarray(histogram, dtype=np.float64)
+    n = len(histogram)
+    green_peak = np.zeros(n, dtype=bool)
+    red_peak = np.zeros(n, dtype=bool)
+    if n < 3:
+        return green_peak, red_peak
+
+    # delta[k] is the change from bar k to bar k + 1, i.e. MACD_Histogram_Delta at bar k + 1
+    delta = np.diff(histogram)
+    previous_delta, current_delta = delta[:-1], delta[1:]
+    # NaN compares False on both sides, exactly like the original row loop
+    green = (previous_delta > 0) & (current_delta <= 0)
+    red = (previous_delta < 0) & (current_delta >= 0)
+
+    if confirmed:
+        green_peak[2:] = green
+        red_peak[2:] = red
+    else:
+        green_peak[1:-1] = green
+        red_peak[1:-1] = red
+    return green_peak, red_peak
+
+
+def identify_macd_peaks_and_troughs_using_derivative(data, confirmed=False):
+    # Calculate the first derivative (rate of change) of the MACD Histogram
+    data['MACD_Histogram_Delta'] = data['MACD_Histogram'].diff()
+
+    # Flag peaks and troughs in one pass over the histogram
+    green_peak, red_peak = macd_histogram_turning_points(data['MACD_Histogram'].to_numpy(), confirmed=confirmed)
+    data['Green_Peak'] = green_peak
+    data['Red_Peak'] = red_peak
+
+    return data
+
+
+def macd_histogram_local_extrema(histogram, mode='centered'):
+    """
+    Find 3-bar local extrema of the MACD histogram.
+    Green peaks: bars higher than both the previous and the next bar.
+    Red peaks: bars lower than both the previous and the next bar.
+
+    mode='centered' flags the extremum bar itself, which needs the next bar and so looks one bar ahead.
+    mode='causal' flags the following bar, where the extremum is first confirmed, so it can be used live.
+    """
+    if mode not in ('centered', 'causal'):
+        raise ValueError("Unsupported extremum mode: " + str(mode))
+
+    histogram = np.asarray(histogram, dtype=np.float64)
+    n = len(histogram)
+    green_peak = np.zeros(n, dtype=bool)
+    red_peak = np.zeros(n, dtype=bool)
+    if n < 3:
+        return green_peak, red_peak
+
+    previous_bar, current_bar, next_bar = histogram[:-2], histogram[1:-1], histogram[2:]
+    green = (current_bar > previous_bar) & (current_bar > next_bar)
+    red = (current_bar < previous_bar) & (current_bar < next_bar)
+
+    if mode == 'centered':
+        green_peak[1:-1] = green
+        red_peak[1:-1] = red
+    else:
+        green_peak[2:] = green
+        red_peak[2:] = red
+    return green_peak, red_peak
+
+
+def identify_macd_peaks_and_troughs(data, mode='centered'):
+    """
+    Identify MACD histogram peaks and troughs.
+    Green peaks: Points where the histogram is higher than both the previous and next bars.
+    Red troughs: Points where the histogram is lower than both the previous and next bars.
+    """
+    green_peak, red_peak = macd_histogram_local_extrema(data['MACD_Histogram'].to_numpy(), mode=mode)
+    data['Green_Peak'] = green_peak
+    data['Red_Peak'] = red_peak
+
+    return data
+
+
+# Pandas wrappers with the signatures the trading scripts use.
+# Float32 inputs (compact_data.py frames) give float32 results; the arithmetic itself stays in float64.
+
+def _result_dtype(*columns):
+    return np.float32 if all(column.dtype == np.float32 for column in columns) else np.float64
+
+
+def compute_rsi(data, window=14):
+    """RSI of a price Series."""
+    values = rsi(data.to_numpy(dtype=np.float64), window)
+    return pd.Series(values.astype(_result_dtype(data), copy=False), index=data.index, name=data.name)
+
+
+def calculate_rsi(data, window=14):
+    """RSI of data['Close'], counting the first price change as zero."""
+    values = rsi(data['Close'].to_numpy(dtype=np.float64), window, seed_first_delta=True)
+    return pd.Series(values.astype(_result_dtype(data['Close']), copy=False), index=data.index)
+
+
+def calculate_atr(data, window=14):
+    """ATR of an OHLC frame."""
+    values = atr(data['High'].to_numpy(dtype=np.float64), data['Low'].to_numpy(dtype=np.float64),
+                 data['Close'].to_numpy(dtype=np.float64), window)
+    dtype = _result_dtype(data['High'], data['Low'], data['Close'])
+    return pd.Series(values.astype(dtype, copy=False), index=data.index)
+
+
+compute_atr = calculate_atr
+
+
+def calculate_macd(data, n_slow=26, n_fast=12, n_signal=9):
+    """MACD and signal line Series of data['Close']."""
+    macd_line, signal_line, _ = macd(data['Close'].to_numpy(dtype=np.float64), n_fast, n_slow, n_signal)
+    dtype = _result_dtype(data['Close'])
+    return (pd.Series(macd_line.astype(dtype, copy=False), index=data.index),
+            pd.Series(signal_line.astype(dtype, copy=False), index=data.index))
+
+
+def add_macd_columns(df, signal_column='Signal', fast=12, slow=26, signal=9):
+    """Set the MACD, signal and MACD_Histogram columns of df in place."""
+    macd_line, signal_line, histogram = macd(df['Close'].to_numpy(dtype=np.float64), fast, slow, signal)
+    dtype = _result_dtype(df['Close'])
+    df['MACD'] = macd_line.astype(dtype, copy=False)
+    df[signal_column] = signal_line.astype(dtype, copy=False)
+    df['MACD_Histogram'] = histogram.astype(dtype, copy=False)
+    return df
+
+
+def add_indicator_columns(df, signal_column='Signal', fast=12, slow=26, signal=9, rsi_window=14, atr_window=14):
+    """Set MACD, signal, MACD_Histogram, RSI and ATR columns of an OHLC frame in place with one fused sweep."""
+    outputs = macd_rsi_atr(df['High'].to_numpy(dtype=np.float64), df['Low'].to_numpy(dtype=np.float64),
+                           df['Close'].to_numpy(dtype=np.float64), fast, slow, signal, rsi_window, atr_window)
+    dtype = _result_dtype(df['High'], df['Low'], df['Close'])
+    for column, values in zip(('MACD', signal_column, 'MACD_Histogram', 'RSI', 'ATR'), outputs):
+        df[column] = values.astype(dtype, copy=False)
+    return df
+
+
+def calculate_vwap(data, session='D'):
+    """Session VWAP of the typical price of a kline frame; session is a pandas frequency the index is floored to."""
+    price = typical_price(data['High'], data['Low'], data['Close'])
+    sessions = data.index.floor(session).asi8
+    return pd.Series(session_vwap(price, data['Volume'].to_numpy(dtype=np.float64), sessions), index=data.index)
+
+
+def calculate_support_resistance_levels(data, lookback_period=20):
+    """
+    Support (lowest Low) and resistance (highest High) over the last lookback_period bars up to each bar,
+    as float arrays indexed by position. Entry i is the min/max of data[:data.index[i]].tail(lookback_period).
+    """
+    support = rolling_min(data['Low'].to_numpy(dtype=np.float64), lookback_period)
+    resistance = rolling_max(data['High'].to_numpy(dtype=np.float64), lookback_period)
+    return support, resistance
@@ -7,6 +7,11 @@ import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime
+from indicator_cache import IndicatorCache
+from dip_index import DipEventIndex
+
+# Indicators of unchanged history are read back from disk; new bars only compute their own rows
+indicator_cache = IndicatorCache()
 
 
 # Function to get stock market trend
@@ -38,23 +43,10 @@ def get_stock_market_trend():
     return positive_count, negative_count, neutral_count, articles
 
 
-# Function to calculate RSI
-def calculate_rsi(data, window=14):
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-# Function to calculate MACD
-def calculate_macd(data, n_slow=26, n_fast=12, n_signal=9):
-    ema_fast = data['Close'].ewm(span=n_fast, adjust=False).mean()
-    ema_slow = data['Close'].ewm(span=n_slow, adjust=False).mean()
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=n_signal, adjust=False).mean()
-    return macd_line, signal_line
+# Major Dip events per ticker, kept across Streamlit reruns
+@st.cache_resource
+def get_dip_index(ticker_symbol):
+    return DipEventIndex(window_size=5, crash_threshold=-9)
 
 
 # Function to get NASDAQ Composite Index data and prepare the enhanced chart
@@ -64,21 +56,14 @@ def get_nasdaq_chart(ticker_symbol, start_date=None, end_date=None, time_frame=N
         end_date = datetime.now()
         start_date = end_date - pd.DateOffset(years=time_frame)
     hist = ticker_data.history(start=start_date, end=end_date)
-    hist['RSI'] = calculate_rsi(hist)
-    hist['MACD_Line'], hist['Signal_Line'] = calculate_macd(hist)
+    hist['RSI'] = indicator_cache.calculate_rsi(hist)
+    hist['MACD_Line'], hist['Signal_Line'] = indicator_cache.calculate_macd(hist)
     plt.figure(figsize=(15, 8))
     plt.plot(hist.index, hist['Close'], color='blue', linewidth=1)
-    major_crash_threshold = -9
-    window_size = 5
-    for i in range(window_size, len(hist)):
-        window = hist.iloc[i - window_size:i]
-        percent_change = (hist['Close'].iloc[i] - window['Close'].max()) / window['Close'].max() * 100
-        if percent_change <= major_crash_threshold and 30 <= hist['RSI'].iloc[i] <= 40 and hist['MACD_Line'].iloc[i] < \
-                hist['Signal_Line'].iloc[i]:
-            plt.scatter(hist.index[i], hist['Close'].iloc[i], color='red',
-                        label='Major Dip (RSI 30-40, MACD < Signal)' if 'Major Dip (RSI 30-40, MACD < Signal)' not in
-                                                                          plt.gca().get_legend_handles_labels()[
-                                                                              1] else '')
+    # Only bars not seen on an earlier load are scanned; the chart range is two binary searches
+    dips = get_dip_index(ticker_symbol).update(hist).query(hist.index[0], hist.index[-1]) if len(hist) else []
+    if len(dips):
+        plt.scatter(dips.index, dips, color='red', label='Major Dip (RSI 30-40, MACD < Signal)')
     plt.title(f'{ticker_symbol} - Custom Timeframe')
     plt.xlabel('Date')
     plt.ylabel('Close Price')
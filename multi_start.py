@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+from indicator_graph import IndicatorGraph
+from indicators import macd_histogram_local_extrema
+from stop_loss import AtrStopLoss
+from walk_forward import late_start_indicators, settle_bars
+
+
+# The month-offset backtests: the same all-in MACD extrema strategy rerun from many start dates, always to the
+# last bar.
+#
+# Two runs that hold the same state on some bar (flat, or long since the same entry bar) decide the same way on
+# every later bar once their indicators agree, so from there on one run's cash and holdings are the other's
+# times a fixed ratio. The earliest start is run in full and its state recorded per bar; every other start is
+# run from its own first bar, with its own cold-started indicators, only until it meets that reference run
+# after its indicators have settled. Its final value is then the reference's scaled by the ratio at that bar.
+
+def _entry_signals(histogram, rsi, buy_rsi_below, sell_rsi_above):
+    green_peak, red_peak = macd_histogram_local_extrema(histogram)
+    return red_peak & (rsi < buy_rsi_below), green_peak & (rsi > sell_rsi_above)
+
+
+class _Run:
+    """One start's bar-by-bar run of the strategy, optionally recording its state on every bar."""
+
+    def __init__(self, close, buy_ok, sell_ok, atr, first, initial_capital, params, record=False):
+        self.close, self.buy_ok, self.sell_ok = close, buy_ok, sell_ok
+        self.first = first
+        self.params = params
+        self.cash, self.holdings = float(initial_capital), 0.0
+        self.last_trade_price = 999999
+        self.entry = -1
+        self.streak = 0
+        self.trades = 0
+        self.atr_stop = AtrStopLoss(atr, params['atr_multiplier']) if params['atr_multiplier'] else None
+        self.totals = [float(initial_capital)]
+        if record:
+            n = len(close)
+            self.entries = np.full(n, -1)
+            self.streaks = np.zeros(n, dtype=np.int64)
+            self.amounts = np.zeros(n)
+            self.trade_counts = np.zeros(n, dtype=np.int64)
+            self.amounts[first] = self.cash
+        else:
+            self.entries = None
+
+    def step(self, i):
+        close, params = self.close[i], self.params
+        max_streak = params['max_trade_streak']
+        if max_streak is not None and self.streak >= max_streak:
+            # The bar after max_streak back-to-back trades sits out, as in backtest.run_strategy
+            self.streak = 0
+        elif i - self.first > params['skip_bars']:
+            if self.atr_stop is not None:
+                self.atr_stop.update(i)
+            traded = True
+            if self.buy_ok[i] and self.cash > 0:
+                if self.atr_stop is not None:
+                    self.atr_stop.enter(i, close)
+                self.holdings, self.cash = self.cash / close, 0.0
+                self.last_trade_price, self.entry = close, i
+            elif (self.sell_ok[i] and self.holdings > 0
+                  and (not params['require_profit'] or self.last_trade_price < close)):
+                self.cash, self.holdings = self.holdings * close, 0.0
+                self.last_trade_price, self.entry = close, -1
+                if self.atr_stop is not None:
+                    self.atr_stop.exit()
+            elif self.atr_stop is not None and self.atr_stop.is_active() and self.holdings > 0:
+                traded = self.atr_stop.is_hit(close)
+                if traded:
+                    self.cash, self.holdings = self.holdings * close, 0.0
+                    self.entry = -1
+                    self.atr_stop.exit()
+            else:
+                traded = False
+            self.streak = self.streak + 1 if traded else 0
+            self.trades += traded
+        else:
+            self.streak = 0
+
+        self.totals.append(self.cash + self.holdings * close)
+        if self.entries is not None:
+            self.entries[i], self.streaks[i] = self.entry, self.streak
+            self.amounts[i] = self.holdings if self.entry >= 0 else self.cash
+            self.trade_counts[i] = self.trades
+
+    def ratio_to(self, reference, i):
+        """Scale from reference to this run if both hold the same state after bar i, else None."""
+        if self.entry != reference.entries[i] or self.streak != reference.streaks[i] or reference.amounts[i] <= 0:
+            return None
+        return (self.holdings if self.entry >= 0 else self.cash) / reference.amounts[i]
+
+
+def multi_start_backtest(data, start_dates, initial_capital, buy_rsi_below=45, sell_rsi_above=65,
+                         require_profit=True, atr_multiplier=None, atr_window=14, rsi_window=14, skip_bars=0,
+                         max_trade_streak=None, fast=12, slow=26, signal=9, sample_every=None):
+    """
+    The MACD extrema strategy of the month-offset backtests, run from every date in start_dates to the last bar
+    of data, with the indicators of each run computed from its own first bar as a fresh run would.
+
+    Buys with all cash on a MACD histogram trough with RSI(rsi_window) < buy_rsi_below; sells everything on a
+    peak with RSI > sell_rsi_above, only above the last trade price if require_profit; with atr_multiplier,
+    also sells when the close falls below the trailing ATR stop. The first skip_bars bars of a run never trade,
+    and with max_trade_streak the bar after that many back-to-back trades never trades, the same rule as
+    backtest.run_strategy. (The 0.8x script's own loop left that bar's cash and holdings at zero, wiping out
+    the run; that was a bug, not the rule.)
+
+    Returns one row per start with a bar in data: Start Date, End Date, Final Portfolio Value, Value if Held and
+    Trades. With sample_every, Sampled Values holds the initial capital and the value on every sample_every-th
+    bar of the run.
+    """
+    indicators = IndicatorGraph(data)
+    series = {
+        'Close': indicators['Close'].to_numpy(),
+        'High': indicators['High'].to_numpy(),
+        'Low': indicators['Low'].to_numpy(),
+        'MACD_Histogram': indicators['MACD_Histogram(%d, %d, %d)' % (fast, slow, signal)].to_numpy(),
+        'RSI': indicators['RSI(%d)' % rsi_window].to_numpy(),
+        'ATR': indicators['ATR(%d)' % atr_window].to_numpy(),
+    }
+    close = series['Close']
+    n = len(close)
+    params = {'require_profit': require_profit, 'atr_multiplier': atr_multiplier, 'skip_bars': skip_bars,
+              'max_trade_streak': max_trade_streak}
+    settle = settle_bars(fast, slow, signal)
+    full_buy_ok, full_sell_ok = _entry_signals(series['MACD_Histogram'], series['RSI'], buy_rsi_below,
+                                               sell_rsi_above)
+
+    def start_run(first, record=False):
+        run_indicators = late_start_indicators(series, first, n, 0, rsi_window, atr_window, (fast, slow, signal),
+                                               settle)
+        buy_ok, sell_ok = full_buy_ok.copy(), full_sell_ok.copy()
+        buy_ok[first:], sell_ok[first:] = _entry_signals(run_indicators['MACD_Histogram'], run_indicators['RSI'],
+                                                         buy_rsi_below, sell_rsi_above)
+        atr = series['ATR'].copy()
+        atr[first:] = run_indicators['ATR']
+        run = _Run(close, buy_ok, sell_ok, atr, first, initial_capital, params, record)
+        # From this bar on every input equals the whole-series one the reference run reads
+        run.settled = first + max(settle, rsi_window + 1, atr_window + 1, skip_bars + 1)
+        return run
+
+    start_dates = [pd.Timestamp(start_date) for start_date in start_dates]
+    firsts = [int(data.index.searchsorted(start_date, side='left')) for start_date in start_dates]
+    reference = None
+    results = []
+    for start_date, first in zip(start_dates, firsts):
+        if first >= n:
+            continue
+        if reference is None:
+            reference = start_run(min(first for first in firsts if first < n), record=True)
+            for i in range(reference.first + 1, n):
+                reference.step(i)
+            reference_totals = np.array(reference.totals[1:])
+
+        run = reference if first == reference.first else start_run(first)
+        merged = None
+        if run is not reference:
+            for i in range(first + 1, n):
+                run.step(i)
+                if i + 1 >= run.settled and i >= reference.first:
+                    ratio = run.ratio_to(reference, i)
+                    if ratio is not None:
+                        merged = (i, ratio)
+                        break
+
+        if merged is None:
+            totals, trades = np.array(run.totals), run.trades
+        else:
+            i, ratio = merged
+            # Past bar i the run is the reference scaled by ratio
+            totals = np.concatenate((run.totals, ratio * reference_totals[i - reference.first:]))
+            trades = run.trades + reference.trades - reference.trade_counts[i]
+        row = {
+            'Start Date': start_date,
+            'End Date': data.index[-1],
+            'Final Portfolio Value': totals[-1],
+            'Value if Held': initial_capital * (close[-1] / close[first]),
+            'Trades': trades
+        }
+        if sample_every:
+            row['Sampled Values'] = list(totals[::sample_every])
+        results.append(row)
+    return pd.DataFrame(results)
@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from indicators import atr, ema, rsi
+
+# Smallest chunk worth a task of its own
+MIN_CHUNK_SIZE = 1 << 16
+# Weight below which a carried EMA state no longer changes a float64 result
+EMA_CARRY_TOLERANCE = np.finfo(np.float64).eps / 4
+
+
+# Indicators of one very long series split across worker threads. NumPy releases the GIL inside its
+# kernels, so threads scale without copying years of 1s prices into worker processes.
+#
+# EMAs: every chunk after the first solves y[t] = c * y[t-1] + alpha * x[t] from a zero start. The true
+# value before each chunk is then carried across chunk ends (one multiply-add per chunk), and
+# c ** (k + 1) * carry is added to the k-th value of the chunk, over the first bars only, while that weight is
+# above float64 resolution: the result equals the serial ewm(adjust=False) to rounding error. Rolling windows
+# re-read the bars their first windows overlap and are exact.
+
+def _chunk_bounds(n, workers, chunk_size):
+    if chunk_size is None:
+        chunk_size = max(-(-n // workers), MIN_CHUNK_SIZE)
+    return [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+
+def _run(executor, func, bounds):
+    return list(executor.map(lambda bound: func(*bound), bounds))
+
+
+def _parallel_ema(executor, values, span, bounds, out):
+    if np.isnan(values).any():
+        # NaN weighting depends on the whole history; leave it to the serial kernel
+        return ema(values, span, out=out)
+
+    first_end = bounds[0][1]
+
+    def local(start, end):
+        if start == 0:
+            ema(values[:end], span, out=out[:end])
+        else:
+            ema(values[start:end], span, out=out[start:end], initial=0.0)
+
+    _run(executor, local, bounds)
+
+    coefficient = 1.0 - 2.0 / (span + 1.0)
+    carries = [out[first_end - 1]]
+    for start, end in bounds[1:-1]:
+        carries.append(out[end - 1] + coefficient ** (end - start) * carries[-1])
+
+    # Past this many bars the carry's weight is under float64 resolution, so the correction stops there
+    settle = int(np.ceil(np.log(EMA_CARRY_TOLERANCE) / np.log(coefficient))) if coefficient > 0 else 0
+    decay = coefficient ** np.arange(1, settle + 1)
+
+    def correct(start, end, carry):
+        length = min(end - start, settle)
+        out[start:start + length] += carry * decay[:length]
+
+    list(executor.map(lambda args: correct(*args), [bound + (carry,) for bound, carry in zip(bounds[1:], carries)]))
+    return out
+
+
+def parallel_ema(values, span, workers=None, chunk_size=None, out=None):
+    """ema() computed in chunks on worker threads."""
+    values = np.asarray(values, dtype=np.float64)
+    out = out if out is not None else np.empty(len(values))
+    if len(values) == 0:
+        return out
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(workers) as executor:
+        return _parallel_ema(executor, values, span, _chunk_bounds(len(values), workers, chunk_size), out)
+
+
+def parallel_macd(close, fast=12, slow=26, signal=9, workers=None, chunk_size=None):
+    """MACD line, signal line and histogram of macd(), computed in chunks on worker threads."""
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    macd_line, signal_line, histogram = np.empty(n), np.empty(n), np.empty(n)
+    if n == 0:
+        return macd_line, signal_line, histogram
+    workers = workers or os.cpu_count() or 1
+    bounds = _chunk_bounds(n, workers, chunk_size)
+    with ThreadPoolExecutor(workers) as executor:
+        _parallel_ema(executor, close, fast, bounds, macd_line)
+        # The histogram buffer holds the slow EMA until the signal line is known
+        _parallel_ema(executor, close, slow, bounds, histogram)
+        _run(executor, lambda start, end: np.subtract(macd_line[start:end], histogram[start:end],
+                                                      out=macd_line[start:end]), bounds)
+        _parallel_ema(executor, macd_line, signal, bounds, signal_line)
+        _run(executor, lambda start, end: np.subtract(macd_line[start:end], signal_line[start:end],
+                                                      out=histogram[start:end]), bounds)
+    return macd_line, signal_line, histogram
+
+
+def _parallel_windowed(kernel, inputs, window, workers, chunk_size):
+    n = len(inputs[0])
+    out = np.empty(n)
+    workers = workers or os.cpu_count() or 1
+
+    def local(start, end):
+        # The window before the chunk, as in the fused kernel
+        first = max(start - window, 0)
+        out[start:end] = kernel(*[values[first:end] for values in inputs], window)[start - first:]
+
+    with ThreadPoolExecutor(workers) as executor:
+        _run(executor, local, _chunk_bounds(n, workers, chunk_size))
+    return out
+
+
+def parallel_rsi(close, window=14, workers=None, chunk_size=None):
+    """rsi() computed in chunks on worker threads; identical to the serial result."""
+    return _parallel_windowed(rsi, [np.asarray(close, dtype=np.float64)], window, workers, chunk_size)
+
+
+def parallel_atr(high, low, close, window=14, workers=None, chunk_size=None):
+    """atr() computed in chunks on worker threads; identical to the serial result."""
+    inputs = [np.asarray(values, dtype=np.float64) for values in (high, low, close)]
+    return _parallel_windowed(atr, inputs, window, workers, chunk_size)
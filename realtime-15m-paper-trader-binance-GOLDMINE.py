@@ -8,6 +8,10 @@ from binance import Client
 from pandas.errors import SettingWithCopyWarning
 import json
 from pytz import timezone
+from indicators import add_macd_columns, compute_rsi, identify_macd_peaks_and_troughs_using_derivative
+from incremental_indicators import IncrementalIndicatorEngine
+from indicator_graph import IndicatorGraph
+from backtest import long_only_backtest
 
 
 # Initialize Binance client
@@ -19,62 +23,11 @@ symbol = 'BTCUSDT'
 csv_filename = 'BTCUSDT-1s-data.csv'
 
 # Technical analysis functions
-def calculate_atr(data, window=7):
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    atr = true_range.rolling(window).mean()
-    return atr
-
-# Function to calculate MACD and signal line
-def calculate_macd(df):
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    df['MACD'] = macd
-    df['Signal'] = signal
-    df['MACD_Histogram'] = macd - signal
-
-def compute_rsi(data, window=7):
-    delta = data.diff()
-    up, down = delta.clip(lower=0), -1 * delta.clip(upper=0)
-    roll_up = up.rolling(window).mean()
-    roll_down = down.rolling(window).mean()
-    rs = roll_up / roll_down
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def identify_macd_peaks_and_troughs_using_derivative(data):
-    # Calculate the first derivative (rate of change) of the MACD Histogram
-    data['MACD_Histogram_Delta'] = data['MACD_Histogram'].diff()
-
-    # Initialize columns for peaks and troughs
-    data['Green_Peak'] = False
-    data['Red_Peak'] = False
-
-    # Iterate over the data
-    for i in range(2, len(data)):
-        # Check for Green Peak (MACD Histogram peak)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] > 0 and data['MACD_Histogram_Delta'].iloc[i] <= 0:
-            data['Green_Peak'].iloc[i - 1] = True
-
-        # Check for Red Trough (MACD Histogram trough)
-        if data['MACD_Histogram_Delta'].iloc[i - 1] < 0 and data['MACD_Histogram_Delta'].iloc[i] >= 0:
-            data['Red_Peak'].iloc[i - 1] = True
-
-    return data
-
-def buy_signal_macd_peaks(data):
-    identify_macd_peaks_and_troughs_using_derivative(data)
-    return data['Red_Peak']
-
-def sell_signal_macd_peaks(data):
-    identify_macd_peaks_and_troughs_using_derivative(data)
-    return data['Green_Peak']
+def buy_signal_macd_peaks(indicators):
+    return indicators['Red_Peak']
+
+def sell_signal_macd_peaks(indicators):
+    return indicators['Green_Peak']
 
 # Function to get current ticker price
 def get_current_price():
@@ -95,8 +48,8 @@ def update_csv(filename, price):
         # Append new data
         combined_data = pd.concat([existing_data, new_data])
         # Update indicators
-        calculate_macd(combined_data)
-        compute_rsi(combined_data)
+        add_macd_columns(combined_data)
+        combined_data['RSI'] = compute_rsi(combined_data['Close'], window=7)
         identify_macd_peaks_and_troughs_using_derivative(combined_data)
         # Save updated data
         combined_data.to_csv(filename)
@@ -111,114 +64,23 @@ def update_csv(filename, price):
         new_data.to_csv(filename)
 
 def trading_strategy_retrospective(data, initial_capital):
-    # Calculate MACD and Signal Line
-    exp1 = data['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = exp1 - exp2
-    data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-    data['MACD_Histogram'] = data['MACD'] - data['Signal_Line']
-
-    # RSI and ATR
-    data['RSI'] = compute_rsi(data['Close'])
-    data['ATR'] = calculate_atr(data)
+    # MACD, Signal Line, RSI and ATR, each computed once and shared with the signals below
+    indicators = IndicatorGraph(data)
+    indicators.assign({'MACD': 'MACD', 'Signal_Line': 'Signal_Line', 'MACD_Histogram': 'MACD_Histogram',
+                       'RSI': 'RSI(7)', 'ATR': 'ATR(7)'})
 
-    # Initialize portfolio and trade log
-    portfolio = pd.DataFrame(index=data.index)
-    portfolio['holdings'] = np.zeros(len(data))
-    portfolio['cash'] = np.zeros(len(data))
-    portfolio['cash'][0] = initial_capital
-    portfolio['total'] = portfolio['cash']
-    trade_log = []
     # Generate signals based on MACD peaks
-    buy_signal = buy_signal_macd_peaks(data)
-    sell_signal = sell_signal_macd_peaks(data)
+    buy_signal = buy_signal_macd_peaks(indicators)
+    sell_signal = sell_signal_macd_peaks(indicators)
 
-    # New variable to track if a position is held
-    position_held = False
-
-    for i in range(1, len(data)):
-
-        portfolio['holdings'][i] = portfolio['holdings'][i - 1]
-        portfolio['cash'][i] = portfolio['cash'][i - 1]
-
-        date = data.index[i]
-
-        if buy_signal[i] and not position_held  and portfolio['cash'][i - 1] > 0 and data['RSI'][i] < rsi_lower_limit and data['ATR'][i] < 1000:
-            # Calculate transaction cost
-            transaction_cost = portfolio['cash'][i - 1] * maker_taker_fee
-            invest_amount = portfolio['cash'][i - 1] - transaction_cost
-            portfolio['holdings'][i] = invest_amount / data['Close'][i]
-            portfolio['cash'][i] = 0
-            #print(f"{date} - Buy: Price = {data['Close'][i]}, Amount = {invest_amount}")
-            trade_log.append({
-                'Date': date,
-                'Action': 'Buy',
-                'Price': data['Close'][i],
-                'BTC_Amount': invest_amount / data['Close'][i],
-                'Cash_Used': invest_amount,
-                'RSI': data['RSI'][i],
-                'ATR': data['ATR'][i]
-            })
-            print({
-                'Date': date,
-                'Action': 'Buy',
-                'Price': data['Close'][i],
-                'BTC_Amount': invest_amount / data['Close'][i],
-                'Cash_Used': invest_amount,
-                'RSI': data['RSI'][i],
-                'ATR': data['ATR'][i]
-            })
-            position_held = True
-
-        elif sell_signal[i] and position_held and portfolio['holdings'][i - 1] > 0 and data['RSI'][i] > rsi_upper_limit and data['ATR'][i] < 1000:
-            # Calculate transaction cost
-            sell_value = portfolio['holdings'][i - 1] * data['Close'][i]
-            transaction_cost = sell_value * maker_taker_fee
-            portfolio['cash'][i] = sell_value - transaction_cost
-            #print(f"{date} - Sell: Price = {data['Close'][i]}, Amount = {sell_value}")
-            portfolio['holdings'][i] = 0
-            trade_log.append({
-                'Date': date,
-                'Action': 'Sell',
-                'Price': data['Close'][i],
-                'BTC_Amount': portfolio['holdings'][i - 1],
-                'Cash_Gained': sell_value,
-                'RSI': data['RSI'][i],
-                'ATR': data['ATR'][i]
-            })
-            print({
-                'Date': date,
-                'Action': 'Sell',
-                'Price': data['Close'][i],
-                'BTC_Amount': portfolio['holdings'][i - 1],
-                'Cash_Gained': sell_value,
-                'RSI': data['RSI'][i],
-                'ATR': data['ATR'][i]
-            })
-            position_held = False
-
-        # Update total portfolio value
-        portfolio['total'][i] = portfolio['cash'][i] + portfolio['holdings'][i] * data['Close'][i]
-
-    # Calculate holding value
-    start_price = data.iloc[0]['Close']
-    end_price = data.iloc[-1]['Close']
-    value_if_held = initial_capital * (end_price / start_price)
-
-    return portfolio, trade_log, value_if_held
+    return long_only_backtest(data, buy_signal, sell_signal, initial_capital, fee=maker_taker_fee,
+                              rsi_buy_below=rsi_lower_limit, rsi_sell_above=rsi_upper_limit, max_atr=1000,
+                              on_trade=print)
 
 def trading_strategy_single_realtime(data):
     global portfolio
-    # Calculate MACD and Signal Line
-    exp1 = data['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=26, adjust=False).mean()
-    data['MACD'] = exp1 - exp2
-    data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-    data['MACD_Histogram'] = data['MACD'] - data['Signal_Line']
-
-    # RSI and ATR
-    data['RSI'] = compute_rsi(data['Close'])
-    data['ATR'] = calculate_atr(data)
+    # Update MACD, RSI, ATR and the peak check with the candles added since the last call
+    latest = indicator_engine.update_from_frame(data)
 
     latest_timestamp = data.index[-1]
 
@@ -227,9 +89,9 @@ def trading_strategy_single_realtime(data):
         new_row_values = portfolio.iloc[-1].copy()
         portfolio.loc[latest_timestamp] = new_row_values
 
-    # Generate signals based on MACD peaks
-    buy_signal = buy_signal_macd_peaks(data)
-    sell_signal = sell_signal_macd_peaks(data)
+    # Generate signals based on MACD peaks; a turn is confirmed one candle after the turning bar
+    buy_signal = latest['Previous_Red_Peak']
+    sell_signal = latest['Previous_Green_Peak']
 
     # New variable to track if a position is held
     i = len(data) -1
@@ -240,11 +102,11 @@ def trading_strategy_single_realtime(data):
     date = data.index[i]
     latest_price=get_current_price()
 
-    print(f"Buy signal:{buy_signal[i]}, Sell signal:{sell_signal[i]}, RSI:{data['RSI'][i]}",)
+    print(f"Buy signal:{buy_signal}, Sell signal:{sell_signal}, RSI:{latest['RSI']}",)
     print("Portfolio holdings:", portfolio['holdings'][i])
     print("Portfolio cash:", portfolio['cash'][i])
 
-    if buy_signal[i] and portfolio['cash'][i - 1] > 0 and data['RSI'][i] < rsi_lower_limit and data['ATR'][i] < 1000:
+    if buy_signal and portfolio['cash'][i - 1] > 0 and latest['RSI'] < rsi_lower_limit and latest['ATR'] < 1000:
         # Calculate transaction cost
         transaction_cost = portfolio['cash'][i - 1] * maker_taker_fee
         invest_amount = portfolio['cash'][i - 1] - transaction_cost
@@ -261,8 +123,8 @@ def trading_strategy_single_realtime(data):
             'Price': latest_price,
             'BTC_Amount': invest_amount / latest_price,
             'Cash_Used': invest_amount,
-            'RSI': data['RSI'][i],
-            'ATR': data['ATR'][i]
+            'RSI': latest['RSI'],
+            'ATR': latest['ATR']
         })
         print({
             'Date': date,
@@ -272,11 +134,11 @@ def trading_strategy_single_realtime(data):
             'Price': latest_price,
             'BTC_Amount': invest_amount / latest_price,
             'Cash_Used': invest_amount,
-            'RSI': data['RSI'][i],
-            'ATR': data['ATR'][i]
+            'RSI': latest['RSI'],
+            'ATR': latest['ATR']
         })
         position_held = True
-    elif sell_signal[i] and portfolio['holdings'][i - 1] > 0 and data['RSI'][i] > rsi_upper_limit and data['ATR'][i] < 1000:
+    elif sell_signal and portfolio['holdings'][i - 1] > 0 and latest['RSI'] > rsi_upper_limit and latest['ATR'] < 1000:
         # Calculate transaction cost
         # sell_value = portfolio['holdings'][i - 1] * data['Close'][i]
         sell_value = portfolio['holdings'][i - 1] * latest_price
@@ -291,8 +153,8 @@ def trading_strategy_single_realtime(data):
             'Price': latest_price,
             'BTC_Amount': portfolio['holdings'][i - 1],
             'Cash_Gained': sell_value,
-            'RSI': data['RSI'][i],
-            'ATR': data['ATR'][i]
+            'RSI': latest['RSI'],
+            'ATR': latest['ATR']
         })
         print({
             'Date': date,
@@ -301,8 +163,8 @@ def trading_strategy_single_realtime(data):
             'Price': latest_price,
             'BTC_Amount': portfolio['holdings'][i - 1],
             'Cash_Gained': sell_value,
-            'RSI': data['RSI'][i],
-            'ATR': data['ATR'][i]
+            'RSI': latest['RSI'],
+            'ATR': latest['ATR']
         })
 
     # Update total portfolio value
@@ -472,6 +334,10 @@ btc_data = get_btc_data_for_dates(start_timestamp, end_timestamp)
 
 portfolio, trade_log, value_if_held = trading_strategy_retrospective(btc_data, initial_capital)
 
+# Warm up the incremental indicators on the history once; each new candle is then an O(1) update
+indicator_engine = IncrementalIndicatorEngine(rsi_window=7, atr_window=7)
+indicator_engine.update_from_frame(btc_data)
+
 #Value if held and profit
 print("Total value:", portfolio['total'].iloc[-1])
 print("Profit in trading:", (portfolio['total'].iloc[-1] - initial_capital)/initial_capital*100, "%")
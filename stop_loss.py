@@ -0,0 +1,39 @@
+import numpy as np
+
+
+class AtrStopLoss:
+    """
+    ATR stop loss below the last buy price, read from one causal ATR series computed up front.
+    atr[i] only uses bars up to i, so it equals calculate_atr(data.iloc[:i + 1]).iloc[-1]
+    without recomputing the ATR over a growing slice on every bar.
+
+    With trailing=True the stop is re-anchored to last_buy_price - atr_multiplier * atr[i] on every bar,
+    as the BTC stop-loss backtests do; with trailing=False it stays where it was set at the buy.
+    """
+
+    def __init__(self, atr, atr_multiplier, trailing=True):
+        self.atr = np.asarray(atr, dtype=np.float64)
+        self.atr_multiplier = atr_multiplier
+        self.trailing = trailing
+        self.last_buy_price = None
+        self.stop_loss_atr = None
+
+    def update(self, i):
+        # Move the stop with the current ATR while a position is open
+        if self.trailing and self.stop_loss_atr is not None:
+            self.stop_loss_atr = self.last_buy_price - self.atr_multiplier * self.atr[i]
+
+    def enter(self, i, price):
+        self.last_buy_price = price
+        self.stop_loss_atr = price - self.atr_multiplier * self.atr[i]
+
+    def exit(self):
+        self.last_buy_price = None
+        self.stop_loss_atr = None
+
+    def is_active(self):
+        # Truthiness as in the original `last_buy_price and stop_loss_atr` check
+        return bool(self.last_buy_price and self.stop_loss_atr)
+
+    def is_hit(self, price):
+        return self.is_active() and price < self.stop_loss_atr
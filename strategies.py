@@ -0,0 +1,250 @@
+import numpy as np
+
+from backtest import BUY, SELL, STOP_LOSS, TAKE_PROFIT, Strategy, filter_signals
+from indicator_graph import IndicatorGraph
+from indicators import macd_histogram_local_extrema, rolling_mean
+from stop_loss import AtrStopLoss
+
+
+# The trading rules of the backtest scripts as Strategy classes for backtest.run_strategy.
+# Each prepare() computes its indicators once through an IndicatorGraph; decide() only reads arrays.
+
+def _signal_bars(features):
+    # Bars with a buy or sell signal; bar 0 never trades
+    return np.flatnonzero(features['buy'][1:] | features['sell'][1:]) + 1
+
+
+# Buy and sell flags from the MACD histogram, as (buy, sell) bool arrays
+
+def macd_extrema(histogram):
+    """Troughs (buy) and peaks (sell) of the histogram, on the extremum bar (identify_macd_peaks_and_troughs)."""
+    green_peak, red_peak = macd_histogram_local_extrema(histogram)
+    return red_peak, green_peak
+
+
+def signed_macd_extrema(histogram):
+    """Troughs below zero (buy) and peaks above zero (sell), as identify_macd_peaks in macd_peak_strategy_bitcoin."""
+    buy, sell = macd_extrema(histogram)
+    return buy & (histogram < 0), sell & (histogram > 0)
+
+
+def macd_trend_reversal(histogram):
+    """
+    Buy where the histogram is positive and rising or just turned positive, sell where it is negative and falling
+    or just turned negative (identify_macd_trend_reversal in the 2.2x scripts).
+    """
+    histogram = np.asarray(histogram, dtype=np.float64)
+    buy = np.zeros(len(histogram), dtype=bool)
+    sell = np.zeros(len(histogram), dtype=bool)
+    current, previous = histogram[1:], histogram[:-1]
+    buy[1:] = (current > 0) & ((current > previous) | (previous < 0))
+    sell[1:] = (current < 0) & ((current < previous) | (previous > 0))
+    return buy, sell
+
+
+class MacdPeakFlip(Strategy):
+    """
+    GOLDMINE: all in on a MACD histogram turn up (Red_Peak) while flat, all out on a turn down (Green_Peak)
+    while long, each only with RSI below / above its limit and ATR under max_atr. Same trades as long_only_backtest.
+    """
+
+    def __init__(self, rsi_window=7, atr_window=7, rsi_buy_below=50, rsi_sell_above=50, max_atr=1000, cache=None):
+        self.rsi_window, self.atr_window = rsi_window, atr_window
+        self.rsi_buy_below, self.rsi_sell_above, self.max_atr = rsi_buy_below, rsi_sell_above, max_atr
+        self.cache = cache
+
+    def prepare(self, data):
+        indicators = IndicatorGraph(data, cache=self.cache)
+        rsi = indicators['RSI(%d)' % self.rsi_window].to_numpy()
+        atr = indicators['ATR(%d)' % self.atr_window].to_numpy()
+        buy_ok, sell_ok = filter_signals(indicators['Red_Peak'], indicators['Green_Peak'], rsi, atr,
+                                         self.rsi_buy_below, self.rsi_sell_above, self.max_atr)
+        return {'Close': indicators['Close'].to_numpy(), 'RSI': rsi, 'ATR': atr, 'buy': buy_ok, 'sell': sell_ok}
+
+    def bars(self, features):
+        return _signal_bars(features)
+
+    def decide(self, i, features, state):
+        if features['buy'][i] and state.holdings <= 0 and state.cash > 0:
+            return BUY, 1.0
+        if features['sell'][i] and state.holdings > 0:
+            return SELL, 1.0
+        return None
+
+    def details(self, i, features):
+        return {'RSI': features['RSI'][i], 'ATR': features['ATR'][i]}
+
+
+class MacdCrossover(Strategy):
+    """
+    All in while MACD is above its signal line and RSI < buy_rsi_below, all out while it is below and
+    RSI > sell_rsi_above (100xinbitcoin, 1.4x). With price_guard, buy only under and sell only over the last
+    trade price (1.4x). Run with max_trade_streak=2 for the scripts' trade limit.
+    """
+
+    def __init__(self, rsi_window=14, buy_rsi_below=70, sell_rsi_above=30, price_guard=False):
+        self.rsi_window = rsi_window
+        self.buy_rsi_below, self.sell_rsi_above = buy_rsi_below, sell_rsi_above
+        self.price_guard = price_guard
+
+    def prepare(self, data):
+        indicators = IndicatorGraph(data)
+        macd_line, signal_line = indicators['MACD'].to_numpy(), indicators['Signal_Line'].to_numpy()
+        rsi = indicators['RSI(%d)' % self.rsi_window].to_numpy()
+        return {'Close': indicators['Close'].to_numpy(),
+                'buy': (macd_line > signal_line) & (rsi < self.buy_rsi_below),
+                'sell': (macd_line < signal_line) & (rsi > self.sell_rsi_above)}
+
+    def bars(self, features):
+        return _signal_bars(features)
+
+    def decide(self, i, features, state):
+        price = features['Close'][i]
+        if features['buy'][i] and state.cash > 0 and (not self.price_guard or price < state.last_trade_price):
+            return BUY, 1.0
+        if features['sell'][i] and state.holdings > 0 and (not self.price_guard or price > state.last_trade_price):
+            return SELL, 1.0
+        return None
+
+
+class LastTradePriceGuard(Strategy):
+    """
+    All in on a buy signal, all out on a sell signal, buying only under and selling only over the last trade price
+    (guard_buy / guard_sell). signals maps the MACD histogram to (buy, sell) flags; buy_rsi_below and
+    sell_rsi_above add RSI filters when given (macd_peak_strategy_bitcoin, the 2.2x scripts).
+    Run with max_trade_streak=2 for the scripts' trade limit.
+    """
+
+    def __init__(self, signals=macd_extrema, rsi_window=14, buy_rsi_below=None, sell_rsi_above=None,
+                 guard_buy=True, guard_sell=True):
+        self.signals = signals
+        self.rsi_window = rsi_window
+        self.buy_rsi_below, self.sell_rsi_above = buy_rsi_below, sell_rsi_above
+        self.guard_buy, self.guard_sell = guard_buy, guard_sell
+
+    def prepare(self, data):
+        indicators = IndicatorGraph(data)
+        buy, sell = self.signals(indicators['MACD_Histogram'].to_numpy())
+        if self.buy_rsi_below is not None or self.sell_rsi_above is not None:
+            rsi = indicators['RSI(%d)' % self.rsi_window].to_numpy()
+            if self.buy_rsi_below is not None:
+                buy &= rsi < self.buy_rsi_below
+            if self.sell_rsi_above is not None:
+                sell &= rsi > self.sell_rsi_above
+        return {'Close': indicators['Close'].to_numpy(), 'buy': buy, 'sell': sell}
+
+    def bars(self, features):
+        return _signal_bars(features)
+
+    def decide(self, i, features, state):
+        price = features['Close'][i]
+        if features['buy'][i] and state.cash > 0 and (not self.guard_buy or price < state.last_trade_price):
+            return BUY, 1.0
+        if features['sell'][i] and state.holdings > 0 and (not self.guard_sell or price > state.last_trade_price):
+            return SELL, 1.0
+        return None
+
+
+class VolumeSizedCrossover(Strategy):
+    """
+    MACD crossover with RSI filters that only trades while ATR > volatility_threshold and sizes each trade by the
+    previous bar's volume over its 30-bar average, clipped to 0.1..1 of the cash or holdings
+    (bitcoininvestonvolume). The size is 1 until the average exists. Run with max_trade_streak=2.
+    """
+
+    def __init__(self, volatility_threshold=10, rsi_window=14, atr_window=14, volume_window=30,
+                 buy_rsi_below=70, sell_rsi_above=30):
+        self.volatility_threshold = volatility_threshold
+        self.rsi_window, self.atr_window, self.volume_window = rsi_window, atr_window, volume_window
+        self.buy_rsi_below, self.sell_rsi_above = buy_rsi_below, sell_rsi_above
+
+    def prepare(self, data):
+        indicators = IndicatorGraph(data)
+        macd_line, signal_line = indicators['MACD'].to_numpy(), indicators['Signal_Line'].to_numpy()
+        rsi = indicators['RSI(%d)' % self.rsi_window].to_numpy()
+        volatile = indicators['ATR(%d)' % self.atr_window].to_numpy() > self.volatility_threshold
+        volume = indicators['Volume'].to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            proportion = np.clip(volume / rolling_mean(volume, self.volume_window), 0.1, 1.0)
+        # Sized on the previous bar's volume
+        proportion = np.concatenate(([1.0], proportion[:-1]))
+        proportion[np.isnan(proportion)] = 1.0
+        return {'Close': indicators['Close'].to_numpy(), 'size': proportion,
+                'buy': (macd_line > signal_line) & (rsi < self.buy_rsi_below) & volatile,
+                'sell': (macd_line < signal_line) & (rsi > self.sell_rsi_above) & volatile}
+
+    def bars(self, features):
+        return _signal_bars(features)
+
+    def decide(self, i, features, state):
+        if features['buy'][i] and state.cash > 0:
+            return BUY, features['size'][i]
+        if features['sell'][i] and state.holdings > 0:
+            return SELL, features['size'][i]
+        return None
+
+
+class AtrStopLossStrategy(Strategy):
+    """
+    All in on a MACD histogram trough with RSI < buy_rsi_below, all out on a peak above the last trade price with
+    RSI > sell_rsi_above, or when the close falls atr_multiplier ATRs under the buy price (25x, AAPL, loss
+    daytrading). The first atr_window bars never trade; trailing moves the stop with the current ATR.
+
+    With take_profit, also sells once the price is that fraction above the buy price. With fills (a
+    fills.IntrabarFills on the same frame), the stop and the target are checked against each bar's High/Low,
+    at the levels set on the bar before, instead of against the close.
+    """
+
+    def __init__(self, atr_multiplier=2, atr_window=14, rsi_window=14, buy_rsi_below=45, sell_rsi_above=65,
+                 trailing=True, take_profit=None, fills=None):
+        self.atr_multiplier, self.atr_window, self.rsi_window = atr_multiplier, atr_window, rsi_window
+        self.buy_rsi_below, self.sell_rsi_above = buy_rsi_below, sell_rsi_above
+        self.trailing = trailing
+        self.take_profit = take_profit
+        self.fills = fills
+        self.fill_time = None
+
+    def prepare(self, data):
+        indicators = IndicatorGraph(data)
+        buy, sell = macd_extrema(indicators['MACD_Histogram'].to_numpy())
+        rsi = indicators['RSI(%d)' % self.rsi_window].to_numpy()
+        atr = indicators['ATR(%d)' % self.atr_window].to_numpy()
+        return {'Close': indicators['Close'].to_numpy(), 'buy': buy & (rsi < self.buy_rsi_below),
+                'sell': sell & (rsi > self.sell_rsi_above),
+                'stop': AtrStopLoss(atr, self.atr_multiplier, trailing=self.trailing)}
+
+    def bars(self, features):
+        # The stop is checked on every bar while long
+        return range(self.atr_window + 1, len(features['Close']))
+
+    def decide(self, i, features, state):
+        atr_stop, price = features['stop'], features['Close'][i]
+        self.fill_time = None
+        target = None
+        if self.take_profit is not None and state.holdings > 0:
+            target = atr_stop.last_buy_price * (1 + self.take_profit)
+        if self.fills is not None and state.holdings > 0:
+            fill = self.fills.fill(i, atr_stop.stop_loss_atr, target)
+            if fill is not None:
+                action, fill_price, self.fill_time = fill
+                atr_stop.exit()
+                return action, 1.0, fill_price
+
+        atr_stop.update(i)
+        if features['buy'][i] and state.cash > 0:
+            atr_stop.enter(i, price)
+            return BUY, 1.0
+        if features['sell'][i] and state.holdings > 0 and state.last_trade_price < price:
+            atr_stop.exit()
+            return SELL, 1.0
+        if self.fills is None and state.holdings > 0:
+            if atr_stop.is_hit(price):
+                atr_stop.exit()
+                return STOP_LOSS, 1.0
+            if target is not None and price >= target:
+                atr_stop.exit()
+                return TAKE_PROFIT, 1.0
+        return None
+
+    def details(self, i, features):
+        return {'Fill_Time': self.fill_time} if self.fill_time is not None else {}
@@ -0,0 +1,151 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from analytics import bar_returns, exposure, max_drawdown, sharpe_ratio, sortino_ratio
+from backtest import filter_signals, flip_backtest_arrays
+from indicators import atr_matrix, macd, macd_histogram_turning_points, rsi_matrix
+
+# Parameters a sweep can vary, with the GOLDMINE backtest's values as defaults
+DEFAULT_PARAMETERS = {
+    'rsi_buy_below': 50,
+    'rsi_sell_above': 50,
+    'max_atr': 1000,
+    'rsi_window': 7,
+    'atr_window': 7,
+    'fee': 0.00075,
+}
+
+
+# Parameter sweeps of the MACD peak flip over a process pool.
+#
+# The close, the peak flags and the RSI/ATR series for every window in the grid are computed once in the parent
+# and written to one shared memory block. Workers map it as NumPy views when they start, so a task only
+# pickles a list of parameter dicts and sends back a few numbers per run.
+
+def parameter_grid(**values):
+    """Every combination of the given parameter values, as dicts with the other parameters at their defaults."""
+    unknown = set(values) - set(DEFAULT_PARAMETERS)
+    if unknown:
+        raise ValueError('Unknown sweep parameters: %s' % ', '.join(sorted(unknown)))
+    names = list(values)
+    return [dict(DEFAULT_PARAMETERS, **dict(zip(names, combination)))
+            for combination in itertools.product(*[values[name] for name in names])]
+
+
+class SharedArrays:
+    """
+    Named 1-D arrays copied into one shared memory block. spec is small and picklable; attach(spec) in another
+    process maps the same arrays without copying. Use as a context manager; the block is unlinked on exit.
+    """
+
+    def __init__(self, arrays):
+        layout = []
+        offset = 0
+        for name, values in arrays.items():
+            values = np.asarray(values)
+            layout.append((name, values.dtype.str, offset, len(values)))
+            # Keep every array 8-byte aligned
+            offset += -(-values.nbytes // 8) * 8
+        self.memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.spec = (self.memory.name, layout)
+        for (name, dtype, offset, length), values in zip(layout, arrays.values()):
+            np.ndarray(length, dtype=dtype, buffer=self.memory.buf, offset=offset)[:] = values
+
+    @staticmethod
+    def attach(spec):
+        """(memory, arrays) for a spec; close memory once the arrays are no longer used."""
+        name, layout = spec
+        memory = shared_memory.SharedMemory(name=name)
+        arrays = {key: np.ndarray(length, dtype=dtype, buffer=memory.buf, offset=offset)
+                  for key, dtype, offset, length in layout}
+        return memory, arrays
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def share_market_data(data, rsi_windows, atr_windows, fast=12, slow=26, signal=9):
+    """SharedArrays with the close, the Red/Green peak flags, and 'RSI(w)' and 'ATR(w)' for each window."""
+    close = data['Close'].to_numpy(dtype=np.float64)
+    green_peak, red_peak = macd_histogram_turning_points(macd(close, fast, slow, signal)[2])
+    rsi_windows, atr_windows = sorted(set(rsi_windows)), sorted(set(atr_windows))
+    arrays = {'Close': close, 'Red_Peak': red_peak, 'Green_Peak': green_peak}
+    arrays.update(zip(['RSI(%d)' % window for window in rsi_windows], rsi_matrix(close, rsi_windows)))
+    arrays.update(zip(['ATR(%d)' % window for window in atr_windows],
+                      atr_matrix(data['High'], data['Low'], close, atr_windows)))
+    return SharedArrays(arrays)
+
+
+# Worker-side views of the shared block, set up by _attach
+_market = {}
+
+
+def _attach(spec):
+    memory, arrays = SharedArrays.attach(spec)
+    _market.update(arrays, memory=memory)
+
+
+def _detach():
+    memory = _market.pop('memory', None)
+    _market.clear()
+    if memory is not None:
+        memory.close()
+
+
+def _run_chunk(runs, initial_capital):
+    results = []
+    for params in runs:
+        buy_ok, sell_ok = filter_signals(_market['Red_Peak'], _market['Green_Peak'],
+                                         _market['RSI(%d)' % params['rsi_window']],
+                                         _market['ATR(%d)' % params['atr_window']],
+                                         params['rsi_buy_below'], params['rsi_sell_above'], params['max_atr'])
+        position, entries, exits, _, _, total = flip_backtest_arrays(_market['Close'], buy_ok, sell_ok,
+                                                                     initial_capital, params['fee'])
+        returns = bar_returns(total)
+        results.append((total[-1] if len(total) else initial_capital, len(entries) + len(exits),
+                        *max_drawdown(total), sharpe_ratio(returns), sortino_ratio(returns), exposure(position)))
+    return results
+
+
+def parameter_sweep(data, grid, initial_capital=5000, workers=None, chunk_size=None, fast=12, slow=26, signal=9):
+    """
+    Run the MACD peak flip of the GOLDMINE backtest for every parameter dict in grid (see parameter_grid) on the
+    OHLC frame data. workers=1 runs in this process.
+    Returns one row per run: the parameters, Final_Value, Trades, Max_Drawdown (a fraction of the peak),
+    Max_Drawdown_Bars, the per-bar Sharpe and Sortino ratios and Exposure (see analytics).
+    """
+    runs = [dict(DEFAULT_PARAMETERS, **params) for params in grid]
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # A few chunks per worker evens out runs that trade more than others
+        chunk_size = max(-(-len(runs) // (workers * 4)), 1)
+    chunks = [runs[start:start + chunk_size] for start in range(0, len(runs), chunk_size)]
+
+    with share_market_data(data, {params['rsi_window'] for params in runs}, {params['atr_window'] for params in runs},
+                           fast, slow, signal) as market:
+        if workers == 1:
+            _attach(market.spec)
+            try:
+                chunk_results = [_run_chunk(chunk, initial_capital) for chunk in chunks]
+            finally:
+                _detach()
+        else:
+            with ProcessPoolExecutor(workers, initializer=_attach, initargs=(market.spec,)) as executor:
+                chunk_results = list(executor.map(_run_chunk, chunks, itertools.repeat(initial_capital)))
+
+    results = pd.DataFrame(runs, columns=list(DEFAULT_PARAMETERS))
+    statistics = ['Final_Value', 'Trades', 'Max_Drawdown', 'Max_Drawdown_Bars', 'Sharpe', 'Sortino', 'Exposure']
+    results[statistics] = pd.DataFrame([result for chunk in chunk_results for result in chunk], index=results.index)
+    results[['Trades', 'Max_Drawdown_Bars']] = results[['Trades', 'Max_Drawdown_Bars']].astype(int)
+    return results
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from indicators import macd_rsi_atr
+
+_OHLCV = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+# Indicators on several candle intervals from one base series (e.g. 1m klines), aligned back onto the base bars.
+#
+# Bins are aligned to the epoch, like index.floor(interval), so a 4h bin is made of whole 1h bins and each
+# interval is resampled from the largest finer one already built rather than from the base series.
+#
+# No lookahead: a higher-timeframe bar's values appear on the base timeline at the close of the base bar that
+# completes it, or, when its last base bars are missing, at the first base bar of the next bin. Until then the
+# base bars see the previous completed bar. The still-forming last bin of the data is never shown.
+
+def _base_bars(data):
+    n = len(data)
+    bars = {'time': data.index.as_unit('ns').asi8, 'first': np.arange(n), 'last': np.arange(n)}
+    for column in _OHLCV:
+        if column in data:
+            bars[column] = data[column].to_numpy(dtype=np.float64)
+    return bars
+
+
+def _resample(bars, interval):
+    """Aggregate bars into epoch-aligned bins of interval nanoseconds; bins must contain whole source bars."""
+    bins = bars['time'] // interval
+    starts = np.flatnonzero(np.concatenate(([True], bins[1:] != bins[:-1])))
+    ends = np.append(starts[1:], len(bins)) - 1
+    resampled = {'time': bins[starts] * interval, 'first': bars['first'][starts], 'last': bars['last'][ends]}
+    if 'Open' in bars:
+        resampled['Open'] = bars['Open'][starts]
+    resampled['High'] = np.maximum.reduceat(bars['High'], starts)
+    resampled['Low'] = np.minimum.reduceat(bars['Low'], starts)
+    resampled['Close'] = bars['Close'][ends]
+    if 'Volume' in bars:
+        resampled['Volume'] = np.add.reduceat(bars['Volume'], starts)
+    return resampled
+
+
+def _build_intervals(data, intervals):
+    """Resampled bars for each interval, each built from the coarsest finer interval that divides it."""
+    built = {}
+    base = _base_bars(data)
+    for interval in sorted(set(intervals)):
+        sources = [finer for finer in built if interval % finer == 0]
+        source = built[max(sources)] if sources else base
+        built[interval] = _resample(source, interval) if len(source['time']) else source
+    return built
+
+
+def _visible_bin(bars, interval, base_time, base_interval):
+    """Index of the latest completed bin at each base bar, -1 before the first one completes."""
+    n = len(base_time)
+    completes_at = np.full(n, -1)
+    last = bars['last']
+    complete = base_time[last] + base_interval >= bars['time'] + interval
+    # A bin whose own bars ran out early is known to be closed once the next bin starts
+    closed_position = np.where(complete, last, np.append(bars['first'][1:], n))
+    shown = closed_position < n
+    completes_at[closed_position[shown]] = np.flatnonzero(shown)
+    return np.maximum.accumulate(completes_at)
+
+
+def resample_ohlc(data, interval):
+    """OHLC(V) bars of data on an epoch-aligned interval such as '1h', indexed by bin start."""
+    interval = pd.Timedelta(interval).value
+    bars = _resample(_base_bars(data), interval) if len(data) else _base_bars(data)
+    index = pd.DatetimeIndex(pd.to_datetime(bars['time'], unit='ns'), name=data.index.name)
+    if data.index.tz is not None:
+        index = index.tz_localize('UTC').tz_convert(data.index.tz)
+    return pd.DataFrame({column: bars[column] for column in _OHLCV if column in bars}, index=index)
+
+
+def multi_timeframe_indicators(data, intervals, fast=12, slow=26, signal=9, rsi_window=14, atr_window=14,
+                               base_interval=None):
+    """
+    MACD, signal line, histogram, RSI and ATR on every interval in intervals (e.g. ['15m', '1h', '4h']),
+    computed from the OHLC frame data and aligned onto its index without lookahead.
+    Columns are named like 'RSI_1h'. base_interval is the candle length of data, inferred from the index
+    spacing when not given.
+    """
+    base_time = data.index.as_unit('ns').asi8
+    if base_interval is not None:
+        base_interval = pd.Timedelta(base_interval).value
+    elif len(base_time) > 1:
+        base_interval = int(np.median(np.diff(base_time)))
+    else:
+        base_interval = 0
+
+    labels = {pd.Timedelta(interval).value: interval for interval in intervals}
+    built = _build_intervals(data, labels)
+    result = pd.DataFrame(index=data.index)
+    for interval, label in labels.items():
+        bars = built[interval]
+        outputs = macd_rsi_atr(bars['High'], bars['Low'], bars['Close'], fast, slow, signal, rsi_window, atr_window)
+        visible = _visible_bin(bars, interval, base_time, base_interval)
+        for name, values in zip(('MACD', 'Signal_Line', 'MACD_Histogram', 'RSI', 'ATR'), outputs):
+            aligned = np.where(visible >= 0, values[np.maximum(visible, 0)] if len(values) else np.nan, np.nan)
+            result[name + '_' + str(label)] = aligned
+    return result
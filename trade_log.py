@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+BUY = 'Buy'
+SELL = 'Sell'
+STOP_LOSS = 'Sell - Stop Loss'
+TAKE_PROFIT = 'Sell - Take Profit'
+
+ACTIONS = (BUY, SELL, STOP_LOSS, TAKE_PROFIT)
+
+_NAT = np.iinfo(np.int64).min
+
+
+# Trade logs as preallocated columns instead of one dict per trade: int64 times, an int8 action code into
+# self.actions, and float64 price, amount and cash (Cash_Used for buys, Cash_Gained for sells). Extra fields
+# such as RSI and ATR get a float64 column, or an int64 one for timestamps, on first use.
+# Capacity doubles when full, so appending is amortized O(1), and the DataFrame is only built on request.
+
+class TradeLog:
+    """
+    Columnar trade log. record() appends one trade from plain values; append() takes the scripts' trade dict.
+    Indexing and iteration give back trade dicts, so code written for the list of dicts keeps working.
+    """
+
+    def __init__(self, capacity=64, tz=None):
+        self.size = 0
+        self.tz = tz
+        self.actions = list(ACTIONS)
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.codes = np.empty(capacity, dtype=np.int8)
+        self.prices = np.empty(capacity)
+        self.amounts = np.empty(capacity)
+        self.cash = np.empty(capacity)
+        self.extras = {}
+        self._frame = None
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        capacity = max(2 * len(self.times), 1)
+        for name in ('times', 'codes', 'prices', 'amounts', 'cash'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+        for name, column in self.extras.items():
+            missing = np.full(capacity - len(column), _NAT if column.dtype == np.int64 else np.nan, dtype=column.dtype)
+            self.extras[name] = np.concatenate((column, missing))
+
+    def _code(self, action):
+        if action not in self.actions:
+            self.actions.append(action)
+        return self.actions.index(action)
+
+    def _set_extra(self, name, value):
+        column = self.extras.get(name)
+        if column is None:
+            dtype = np.int64 if isinstance(value, pd.Timestamp) else np.float64
+            column = np.full(len(self.times), _NAT if dtype == np.int64 else np.nan, dtype=dtype)
+            self.extras[name] = column
+        column[self.size] = pd.Timestamp(value).value if column.dtype == np.int64 else value
+
+    def record(self, time, action, price, amount, cash, **extras):
+        """Append a trade: time in int64 nanoseconds (UTC for tz-aware logs), action one of self.actions."""
+        if self.size == len(self.times):
+            self._grow()
+        k = self.size
+        self.times[k] = time
+        self.codes[k] = self._code(action)
+        self.prices[k], self.amounts[k], self.cash[k] = price, amount, cash
+        for name, value in extras.items():
+            self._set_extra(name, value)
+        self.size += 1
+        self._frame = None
+
+    def append(self, trade):
+        """Append a trade dict with Date, Action, Price, BTC_Amount and Cash_Used or Cash_Gained."""
+        date = pd.Timestamp(trade['Date'])
+        if self.size == 0 and self.tz is None:
+            self.tz = date.tz
+        extras = {name: value for name, value in trade.items()
+                  if name not in ('Date', 'Action', 'Price', 'BTC_Amount', 'Cash_Used', 'Cash_Gained')}
+        cash = trade['Cash_Used'] if 'Cash_Used' in trade else trade.get('Cash_Gained', np.nan)
+        self.record(date.value, trade['Action'], trade['Price'], trade['BTC_Amount'], cash, **extras)
+
+    def _timestamp(self, value):
+        if value == _NAT:
+            return pd.NaT
+        timestamp = pd.Timestamp(value)
+        return timestamp.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else timestamp
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += self.size
+        if not 0 <= k < self.size:
+            raise IndexError('trade log index out of range')
+        action = self.actions[self.codes[k]]
+        trade = {'Date': self._timestamp(self.times[k]), 'Action': action, 'Price': self.prices[k],
+                 'BTC_Amount': self.amounts[k], ('Cash_Used' if action == BUY else 'Cash_Gained'): self.cash[k]}
+        # Fields the trade did not have are left out, as in its dict
+        for name, column in self.extras.items():
+            if column.dtype == np.int64:
+                if column[k] != _NAT:
+                    trade[name] = self._timestamp(column[k])
+            elif not np.isnan(column[k]):
+                trade[name] = column[k]
+        return trade
+
+    def __iter__(self):
+        return (self[k] for k in range(self.size))
+
+    def _datetimes(self, values):
+        index = pd.DatetimeIndex(values.view('datetime64[ns]'))
+        return index.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else index
+
+    @property
+    def dates(self):
+        """Trade times as a DatetimeIndex."""
+        return self._datetimes(self.times[:self.size])
+
+    def to_frame(self):
+        """The log as a DataFrame like pd.DataFrame(list_of_trade_dicts), with a categorical Action; cached."""
+        if self._frame is None:
+            n = self.size
+            codes = self.codes[:n]
+            buys = codes == self.actions.index(BUY)
+            columns = {
+                'Date': self._datetimes(self.times[:n]),
+                'Action': pd.Categorical.from_codes(codes, categories=self.actions),
+                'Price': self.prices[:n],
+                'BTC_Amount': self.amounts[:n],
+                'Cash_Used': np.where(buys, self.cash[:n], np.nan),
+                'Cash_Gained': np.where(buys, np.nan, self.cash[:n]),
+            }
+            for name, column in self.extras.items():
+                columns[name] = self._datetimes(column[:n]) if column.dtype == np.int64 else column[:n]
+            self._frame = pd.DataFrame(columns)
+        return self._frame
+
+    def save(self, filename):
+        """Write the log to an .npz file in its own dtypes, for load()."""
+        n = self.size
+        arrays = {'extra:' + name: column[:n] for name, column in self.extras.items()}
+        np.savez(filename, times=self.times[:n], codes=self.codes[:n], prices=self.prices[:n],
+                 amounts=self.amounts[:n], cash=self.cash[:n], actions=np.array(self.actions),
+                 tz=np.array(str(self.tz) if self.tz is not None else ''), **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        """Read a log written by save()."""
+        with np.load(filename) as stored:
+            log = cls(capacity=len(stored['times']), tz=str(stored['tz']) or None)
+            log.actions = stored['actions'].tolist()
+            log.size = len(stored['times'])
+            for name in ('times', 'codes', 'prices', 'amounts', 'cash'):
+                setattr(log, name, stored[name].copy())
+            for key in stored.files:
+                if key.startswith('extra:'):
+                    log.extras[key[len('extra:'):]] = stored[key].copy()
+        return log
@@ -0,0 +1,127 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from backtest import long_only_backtest
+from indicator_graph import IndicatorGraph
+from indicators import atr, macd, macd_histogram_turning_points, rsi
+from sweep import SharedArrays
+
+
+# Walk-forward runs of the GOLDMINE backtest: overlapping windows of days_in_period days, stepping back
+# step_back_days at a time from the end of the data.
+#
+# The MACD histogram, RSI and ATR are computed once over the whole series and shared with the workers. Each
+# window gets the indicator values of a run started warmup bars before it (warmup=0: on its own first bar, as
+# the script's per-window rerun did). Rolling means only depend on their window, and the EMAs of a late start
+# differ from the whole-series ones by a term that decays geometrically, so only the first bars after the start
+# are recomputed; past them the window reads its slices of the shared series directly.
+
+def settle_bars(fast=12, slow=26, signal=9):
+    """Bars after which a MACD started late agrees with the whole-series one to double precision."""
+    coefficient = 1.0 - 2.0 / (max(fast, slow, signal) + 1.0)
+    # Twice the bars for c ** k to drop below 2 ** -53, to cover the signal line's EMA of the decaying MACD gap
+    return 2 * math.ceil(-53 * math.log(2.0) / math.log(coefficient))
+
+
+def walk_forward_windows(index, days_in_period=300, step_back_days=30):
+    """(start_date, end_date, first, stop) per window, newest first; rows first..stop-1 have start <= time <= end."""
+    windows = []
+    for start_date in pd.date_range(start=index.max() - pd.DateOffset(days=days_in_period), end=index.min(),
+                                    freq=f'-{step_back_days}D'):
+        end_date = start_date + pd.DateOffset(days=days_in_period)
+        first = int(index.searchsorted(start_date, side='left'))
+        stop = int(index.searchsorted(end_date, side='right'))
+        windows.append((start_date, end_date, first, stop))
+    return windows
+
+
+def late_start_indicators(series, first, stop, warmup, rsi_window, atr_window, macd_settings, settle):
+    """Histogram, RSI and ATR of rows first..stop-1 as computed by a run starting warmup rows before first."""
+    start = max(first - warmup, 0)
+    columns = {name: series[name][first:stop] for name in ('MACD_Histogram', 'RSI', 'ATR')}
+    if start == 0:
+        # A run from the first row is the whole-series run
+        return columns
+
+    for name, head_length, compute in (
+            ('MACD_Histogram', settle, lambda close, high, low: macd(close, *macd_settings)[2]),
+            ('RSI', rsi_window + 1, lambda close, high, low: rsi(close, rsi_window)),
+            ('ATR', atr_window + 1, lambda close, high, low: atr(high, low, close, atr_window))):
+        head_stop = min(start + head_length, stop)
+        if head_stop <= first:
+            continue
+        head = compute(series['Close'][start:head_stop], series['High'][start:head_stop],
+                       series['Low'][start:head_stop])
+        column = columns[name].copy()
+        column[:head_stop - first] = head[first - start:]
+        columns[name] = column
+    return columns
+
+
+def _run_window(series, window, initial_capital, warmup, params):
+    start_date, end_date, first, stop = window
+    indicators = late_start_indicators(series, first, stop, warmup, params['rsi_window'], params['atr_window'],
+                                    params['macd_settings'], params['settle'])
+    # Peaks of the window's own histogram: its first and last rows are never flagged
+    green_peak, red_peak = macd_histogram_turning_points(indicators['MACD_Histogram'])
+    data = pd.DataFrame({'Close': series['Close'][first:stop], 'RSI': indicators['RSI'], 'ATR': indicators['ATR']},
+                        index=pd.DatetimeIndex(series['Time'][first:stop]), copy=False)
+    portfolio, trade_log, value_if_held = long_only_backtest(data, red_peak, green_peak, initial_capital,
+                                                             params['fee'], params['rsi_buy_below'],
+                                                             params['rsi_sell_above'], params['max_atr'])
+    return {
+        'Start Date': start_date,
+        'End Date': end_date,
+        'Final Portfolio Value': portfolio['total'].iloc[-1],
+        'Value if Held': value_if_held
+    }
+
+
+# Worker-side views of the shared series, set up by _attach
+_series = {}
+
+
+def _attach(spec):
+    memory, arrays = SharedArrays.attach(spec)
+    _series.update(arrays, memory=memory)
+
+
+def _run_shared_window(window, initial_capital, warmup, params):
+    return _run_window(_series, window, initial_capital, warmup, params)
+
+
+def walk_forward(data, days_in_period=300, step_back_days=30, initial_capital=5000, warmup=0, workers=None,
+                 cache=None, fee=0.00075, rsi_buy_below=50, rsi_sell_above=50, max_atr=1000, rsi_window=7,
+                 atr_window=7, fast=12, slow=26, signal=9):
+    """
+    The GOLDMINE walk-forward backtest on the OHLC frame data: long_only_backtest on every window of
+    walk_forward_windows, with RSI(rsi_window), ATR(atr_window) and MACD peak signals, on worker processes.
+    Returns one row per window (Start Date, End Date, Final Portfolio Value, Value if Held), newest first.
+    """
+    indicators = IndicatorGraph(data, cache=cache)
+    series = {
+        'Time': data.index.as_unit('ns').to_numpy(),
+        'Close': indicators['Close'].to_numpy(),
+        'High': indicators['High'].to_numpy(),
+        'Low': indicators['Low'].to_numpy(),
+        'MACD_Histogram': indicators['MACD_Histogram(%d, %d, %d)' % (fast, slow, signal)].to_numpy(),
+        'RSI': indicators['RSI(%d)' % rsi_window].to_numpy(),
+        'ATR': indicators['ATR(%d)' % atr_window].to_numpy(),
+    }
+    params = {'fee': fee, 'rsi_buy_below': rsi_buy_below, 'rsi_sell_above': rsi_sell_above, 'max_atr': max_atr,
+              'rsi_window': rsi_window, 'atr_window': atr_window, 'macd_settings': (fast, slow, signal),
+              'settle': settle_bars(fast, slow, signal)}
+    windows = walk_forward_windows(data.index, days_in_period, step_back_days)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        results = [_run_window(series, window, initial_capital, warmup, params) for window in windows]
+    else:
+        with SharedArrays(series) as shared:
+            with ProcessPoolExecutor(workers, initializer=_attach, initargs=(shared.spec,)) as executor:
+                results = list(executor.map(_run_shared_window, windows, itertools.repeat(initial_capital),
+                                            itertools.repeat(warmup), itertools.repeat(params)))
+    return pd.DataFrame(results, columns=['Start Date', 'End Date', 'Final Portfolio Value', 'Value if Held'])